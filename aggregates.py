@@ -0,0 +1,232 @@
+"""Agregados precalculados sobre el dataset limpio.
+
+Se calculan una sola vez al cargar los datos y los usan tanto los gráficos
+del dashboard como la API JSON, así ninguna de las dos recorre el dataframe
+completo por cada request.
+
+Cuando se ingieren filas nuevas (ver ingest.py) ``append`` actualiza los
+agregados solo con esas filas: contadores por valor, matrices periodo x
+valor, heaps con el top por longitud y por cantidad, filas extremas y la
+versión.
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+# Columnas por las que se puede agrupar
+GROUPS = ["lived_in", "diet", "period", "type"]
+
+# Tamaño de los tops que se mantienen con heaps
+TOP_K = 100
+
+
+class _Desc(str):
+    # Orden alfabético invertido, para desempatar en los heaps de cantidades
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+    def __gt__(self, other):
+        return str.__lt__(self, other)
+
+
+def _row_hash_sum(data):
+    # Columnas numéricas como float: una tanda con longitudes enteras se lee
+    # como int64 y tiene que dar el mismo hash que esas filas leídas junto
+    # con el resto, si no cada proceso terminaría con otra versión
+    numeric = data.select_dtypes("number").columns
+    data = data.astype({column: float for column in numeric})
+    return int(pd.util.hash_pandas_object(data, index=False).sum())
+
+
+def _extremes(data, start=0):
+    # Fila con el valor máximo de cada criterio (la primera, como idxmax).
+    # Los mínimos se buscan como máximos del valor negado
+    name_lengths = data["name"].str.len().to_numpy(dtype=float)
+    criteria = {
+        "max_length": data["length"].to_numpy(dtype=float),
+        "min_length": -data["length"].to_numpy(dtype=float),
+        "longest_name": name_lengths,
+        "shortest_name": -name_lengths,
+        "oldest": data["start_ma"].to_numpy(dtype=float),
+        "newest": -data["end_ma"].to_numpy(dtype=float),
+    }
+    extremes = {}
+    for key, values in criteria.items():
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid):
+            pos = valid[np.argmax(values[valid])]
+            extremes[key] = (values[pos], start + int(pos))
+    return extremes
+
+
+class Aggregates:
+    def __init__(self, data):
+        self.data = data
+
+        # Matriz periodo x valor para cada columna agrupable
+        self.period_counts = {
+            group: pd.crosstab(data["period"], data[group]) for group in GROUPS
+        }
+
+        # Cantidad por valor y top de valores por cantidad. En el heap la
+        # raíz es el peor del top: menor cantidad y, a igual cantidad, el
+        # último en orden alfabético
+        self.key_counts = {}
+        self.top_keys = {}
+        for group, table in self.period_counts.items():
+            totals = table.sum(axis=0)
+            self.key_counts[group] = {
+                key: int(count) for key, count in totals[totals > 0].items()
+            }
+            top = totals[totals > 0].sort_values(ascending=False, kind="stable")
+            self.top_keys[group] = [
+                (int(count), _Desc(key)) for key, count in top[:TOP_K].items()
+            ]
+            heapq.heapify(self.top_keys[group])
+
+        # Top por longitud (sin nulos). A igual longitud va primero la fila
+        # anterior, como en un orden estable
+        lengths = data["length"].to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(lengths))
+        longest = valid[np.argsort(-lengths[valid], kind="stable")][:TOP_K]
+        shortest = valid[np.argsort(lengths[valid], kind="stable")][:TOP_K]
+        self.longest = [(lengths[pos], -int(pos)) for pos in longest]
+        self.shortest = [(-lengths[pos], -int(pos)) for pos in shortest]
+        heapq.heapify(self.longest)
+        heapq.heapify(self.shortest)
+
+        # Nombre (en minúsculas) -> posición
+        self.by_name = {
+            name.lower(): pos for pos, name in enumerate(data["name"]) if name == name
+        }
+
+        # Filas extremas (mayor longitud, nombre más corto, etc.): criterio ->
+        # (valor, posición). Sin valores válidos el criterio no está
+        self.extremes = _extremes(data)
+
+        # Versión de los datos, para ETags y caches. Es la suma de los hashes
+        # de las filas, así que se puede actualizar solo con las nuevas
+        self.version_sum = _row_hash_sum(data)
+
+    @property
+    def version(self):
+        return format(self.version_sum & (2**64 - 1), "016x")
+
+    def append(self, data, rows):
+        # `data` es el dataframe completo con `rows` ya agregadas al final
+        start = len(data) - len(rows)
+
+        for group in GROUPS:
+            delta = pd.crosstab(rows["period"], rows[group])
+            # Las celdas que no están en ninguna de las dos quedan en NaN
+            self.period_counts[group] = (
+                self.period_counts[group]
+                .add(delta, fill_value=0)
+                .fillna(0)
+                .astype(np.int64)
+            )
+
+            # Copia, para no modificar un dict que otro hilo puede recorrer
+            counts = dict(self.key_counts[group])
+            changed = delta.sum(axis=0)
+            for key, count in changed[changed > 0].items():
+                counts[key] = counts.get(key, 0) + int(count)
+            self.key_counts[group] = counts
+            self.top_keys[group] = self._update_top_keys(
+                self.top_keys[group], counts, changed[changed > 0].index
+            )
+
+        longest, shortest = list(self.longest), list(self.shortest)
+        lengths = rows["length"].to_numpy(dtype=float)
+        for offset in np.flatnonzero(~np.isnan(lengths)):
+            pos = start + int(offset)
+            self._push_top(longest, (lengths[offset], -pos))
+            self._push_top(shortest, (-lengths[offset], -pos))
+        self.longest, self.shortest = longest, shortest
+
+        for offset, name in enumerate(rows["name"]):
+            if name == name:
+                self.by_name[name.lower()] = start + offset
+
+        extremes = dict(self.extremes)
+        for key, (value, pos) in _extremes(rows, start).items():
+            # Solo si lo supera: a igual valor queda la fila anterior
+            if key not in extremes or value > extremes[key][0]:
+                extremes[key] = (value, pos)
+        self.extremes = extremes
+
+        self.data = data
+        self.version_sum += _row_hash_sum(rows)
+
+    @staticmethod
+    def _push_top(heap, entry):
+        if len(heap) < TOP_K:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    @staticmethod
+    def _update_top_keys(heap, counts, changed):
+        # Las cantidades solo crecen: un valor fuera del top entra solo si
+        # supera a la raíz
+        entries = {str(key): count for count, key in heap}
+        heap = list(heap)
+        for key in changed:
+            if key in entries:
+                entries[key] = counts[key]
+                heap = [(count, _Desc(key)) for key, count in entries.items()]
+                heapq.heapify(heap)
+            else:
+                entry = (counts[key], _Desc(key))
+                if len(heap) < TOP_K:
+                    heapq.heappush(heap, entry)
+                    entries[key] = counts[key]
+                elif entry > heap[0]:
+                    _, removed = heapq.heapreplace(heap, entry)
+                    del entries[str(removed)]
+                    entries[key] = counts[key]
+        return heap
+
+    # Cantidad por valor de `group` para los periodos seleccionados
+    def counts(self, group, periodo="Todos"):
+        if periodo == "Todos":
+            res = pd.Series(self.key_counts[group], dtype=np.int64).sort_index()
+        else:
+            table = self.period_counts[group]
+            table = table.loc[table.index.intersection(periodo)]
+            res = table.sum(axis=0)
+            res = res[res > 0]
+        res.index.name = group
+        return res.rename("count")
+
+    # Top k de valores de `group` por cantidad
+    def top_counts(self, group, k=10, periodo="Todos"):
+        if periodo == "Todos" and k <= TOP_K:
+            top = sorted(self.top_keys[group], reverse=True)[:k]
+            res = pd.Series(
+                [count for count, _ in top],
+                index=pd.Index([str(key) for _, key in top], name=group),
+                dtype=np.int64,
+            )
+            return res.rename("count")
+        return self.counts(group, periodo).sort_values(ascending=False, kind="stable")[
+            :k
+        ]
+
+    # Top k de dinosaurios por longitud
+    def top_by_length(self, k=10, ascending=False):
+        if k > TOP_K:
+            lengths = self.data["length"].to_numpy(dtype=float)
+            valid = np.flatnonzero(~np.isnan(lengths))
+            keys = lengths[valid] if ascending else -lengths[valid]
+            return self.data.take(valid[np.argsort(keys, kind="stable")][:k])
+
+        heap = self.shortest if ascending else self.longest
+        positions = [-neg_pos for _, neg_pos in sorted(heap, reverse=True)[:k]]
+        return self.data.take(positions)
+
+    def find(self, name):
+        pos = self.by_name.get(name.lower())
+        return None if pos is None else self.data.iloc[pos]
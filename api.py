@@ -0,0 +1,169 @@
+"""API JSON de solo lectura sobre los agregados precalculados.
+
+- ``GET /api/v1/counts?group=lived_in&period=...&page=1&per_page=50``
+- ``GET /api/v1/top?by=length&order=asc&k=10``
+- ``GET /api/v1/top?by=lived_in&k=10&period=...``
+- ``GET /api/v1/dinosaurs/<name>``
+
+Todas aceptan ``dataset=<nombre>`` para consultar otro catálogo registrado.
+
+Las respuestas se serializan compactas y llevan un ETag derivado de la
+versión de los datos y de la consulta, de modo que un ``If-None-Match``
+vigente se responde con 304 sin calcular nada. Como la ingesta cambia los
+datos en cualquier momento, van con ``Cache-Control: no-cache``: los
+clientes y caches intermedios revalidan siempre con el ETag.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+from flask import Blueprint, Response, abort, request
+
+from aggregates import GROUPS, TOP_K
+
+API_MAX_PER_PAGE = 500
+# Los tops hasta TOP_K salen de los heaps de Aggregates
+API_MAX_K = TOP_K
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Función que devuelve los agregados de un dataset, se define en init_app
+_get_aggregates = None
+
+
+def _to_json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _record(row):
+    return {key: _to_json_value(value) for key, value in row.items()}
+
+
+# Respuestas JSON y errores, también para ingest.py
+def json_response(payload, status=200):
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return Response(body, status=status, mimetype="application/json")
+
+
+def error(status, message):
+    abort(json_response({"error": message}, status))
+
+
+def _int_arg(name, default, minimum, maximum):
+    # Sin type=int: Flask devolvería el default si el valor no es un número
+    raw = request.args.get(name)
+    try:
+        value = default if raw is None else int(raw)
+    except ValueError:
+        value = None
+    if value is None or not minimum <= value <= maximum:
+        error(400, f"'{name}' debe estar entre {minimum} y {maximum}")
+    return value
+
+
+def _periodo_arg():
+    return request.args.getlist("period") or "Todos"
+
+
+def _group_arg(default):
+    group = request.args.get("group", default)
+    if group not in GROUPS:
+        error(400, f"'group' debe ser uno de {', '.join(GROUPS)}")
+    return group
+
+
+def _aggregates():
+    try:
+        return _get_aggregates(request.args.get("dataset"))
+    except KeyError:
+        error(404, f"No existe el dataset '{request.args.get('dataset')}'")
+
+
+@api.before_request
+def _check_etag():
+    # ETag por versión de datos + consulta: se resuelve antes de calcular
+    version = _aggregates().version
+    digest = hashlib.sha1(request.full_path.encode()).hexdigest()[:16]
+    request.api_etag = f"{version}-{digest}"
+    if request.api_etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(request.api_etag)
+        return response
+
+
+@api.after_request
+def _set_cache_headers(response):
+    if response.status_code == 200:
+        response.set_etag(request.api_etag)
+        # Los datos cambian con cada ingesta: se puede guardar, pero hay que
+        # revalidar con el ETag antes de usarla
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+    return response
+
+
+@api.route("/counts")
+def counts():
+    group = _group_arg("lived_in")
+    page = _int_arg("page", 1, 1, 10**9)
+    per_page = _int_arg("per_page", 50, 1, API_MAX_PER_PAGE)
+
+    res = _aggregates().counts(group, _periodo_arg())
+    res = res.sort_values(ascending=False, kind="stable")
+    start = (page - 1) * per_page
+    items = [
+        {group: key, "count": int(count)}
+        for key, count in res.iloc[start : start + per_page].items()
+    ]
+    return json_response(
+        {
+            "group": group,
+            "total": len(res),
+            "page": page,
+            "per_page": per_page,
+            "items": items,
+        }
+    )
+
+
+@api.route("/top")
+def top():
+    by = request.args.get("by", "length")
+    order = request.args.get("order", "desc")
+    if order not in ("asc", "desc"):
+        error(400, "'order' debe ser asc o desc")
+    k = _int_arg("k", 10, 1, API_MAX_K)
+
+    aggregates = _aggregates()
+    if by == "length":
+        rows = aggregates.top_by_length(k, ascending=(order == "asc"))
+        items = [_record(row) for _, row in rows.iterrows()]
+    elif by in GROUPS:
+        if order == "asc":
+            res = aggregates.counts(by, _periodo_arg()).sort_values(kind="stable")[:k]
+        else:
+            res = aggregates.top_counts(by, k, _periodo_arg())
+        items = [{by: key, "count": int(count)} for key, count in res.items()]
+    else:
+        error(400, f"'by' debe ser length o uno de {', '.join(GROUPS)}")
+
+    return json_response({"by": by, "order": order, "k": k, "items": items})
+
+
+@api.route("/dinosaurs/<name>")
+def dinosaur(name):
+    row = _aggregates().find(name)
+    if row is None:
+        error(404, f"No se encontró el dinosaurio '{name}'")
+    return json_response(_record(row))
+
+
+def init_app(server, get_aggregates):
+    global _get_aggregates
+    _get_aggregates = get_aggregates
+    server.register_blueprint(api)
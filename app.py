@@ -1,13 +1,26 @@
 import dash
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output, State
+from dash import Patch
+from dash.exceptions import PreventUpdate
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import plotly.graph_objects as go
 import plotly.express as px
 from sklearn.preprocessing import MinMaxScaler
 import numpy as np
 import pandas as pd
+import os
 import random
+from urllib.parse import parse_qs
+
+from taxonomy import ROOT as TAXONOMY_ROOT
+
+import api
+import datasets
+import export
+import ingest
+import coalesce
+import memdiag
 
 # call the ability to add external scripts
 external_scripts = [{"src": "https://cdn.tailwindcss.com"}]
@@ -26,37 +39,77 @@ app = dash.Dash(
     external_scripts=external_scripts,
     suppress_callback_exceptions=True,
     title="dinosource",
+    # Id por página en cada request de callback (ver coalesce.py)
+    hooks=coalesce.renderer_hooks(),
 )
 
 server = app.server
 
-data = pd.read_csv(
-    "https://raw.githubusercontent.com/NelbaBarreto/programacion-ciencias-datos/main/data/dinosaurs_dataset.csv"
+# Conjuntos de datos disponibles (ver datasets.py)
+datasets.register_dataset(
+    datasets.DEFAULT_DATASET,
+    "Dinosaurios",
+    "https://raw.githubusercontent.com/NelbaBarreto/programacion-ciencias-datos/main/data/dinosaurs_dataset.csv",
+)
+datasets.register_from_env()
+
+# Motores por dataset, construidos bajo demanda y desalojados por LRU
+engines = datasets.EngineCache(datasets.memory_budget_bytes())
+
+TIMELINE_STEP_MA = datasets.TIMELINE_STEP_MA
+
+# Niveles del árbol taxonómico que se envían por cada nodo seleccionado
+TAXONOMY_DEPTH = 3
+
+# Filtrado de la página de periodo en el navegador (assets/periodo.js) en vez
+# de un callback al servidor por cada click en los checklists
+PERIODO_CLIENTSIDE = os.environ.get("DINOSOURCE_PERIODO_CLIENTSIDE", "1") not in (
+    "",
+    "0",
+    "false",
+)
+
+# Con el filtrado en el servidor, espera en ms sin cambios en los checklists
+# antes de pedir los gráficos de periodo (0 lo desactiva)
+CHECKLIST_DEBOUNCE_MS = int(os.environ.get("DINOSOURCE_CHECKLIST_DEBOUNCE_MS", "0"))
+PERIODO_DEBOUNCE = CHECKLIST_DEBOUNCE_MS > 0 and not PERIODO_CLIENTSIDE
+
+# Cada cuántos ms el navegador consulta si hay datos nuevos (0 lo desactiva).
+# Cada pestaña abierta hace una request por intervalo; si no hay datos nuevos
+# solo compara la versión, y si los hay los gráficos se actualizan con los
+# agregados incrementales, sin recorrer el dataset. Para ver las filas
+# ingeridas en menos de un segundo usar 1000 (medir con loadtest.py)
+LIVE_UPDATE_MS = int(os.environ.get("DINOSOURCE_LIVE_UPDATE_MS", "15000"))
+
+# Selección de periodos que disparan los callbacks de periodo en el servidor
+PERIODO_INPUT = (
+    Input("periodo-selection", "data")
+    if PERIODO_DEBOUNCE
+    else Input("my-checklist", "value")
 )
 
-data["length"] = data["length"].str.replace("m", "")  # Quitar el caracter m
-data["length"] = data["length"].astype(float)
-# Capitalizar los valores de la columna name
-data["name"] = data["name"].str.capitalize()
 
-data.loc[data["period"] == "USA", "period"] = "Late Cretaceous"
+def get_engine(dataset=None):
+    return engines.get(dataset or datasets.DEFAULT_DATASET)
 
 
-def substr_till_second_space(s):
-    parts = s.split(" ")
-    return " ".join(parts[:2])
+# Obtener el motor del dataset indicado en la URL (?dataset=...)
+def get_engine_from_search(search):
+    dataset = parse_qs((search or "").lstrip("?")).get("dataset", [None])[0]
+    if dataset not in datasets.DATASETS:
+        dataset = None
+    return get_engine(dataset)
 
 
-data["full_period"] = data["period"]
-data["period"] = data["full_period"].apply(substr_till_second_space)
+# Construir el motor por defecto al iniciar
+get_engine()
 
-# Corregir los valores de la columna "lived_in"
-data.loc[data["lived_in"] == "North Africa", "lived_in"] = "Algeria"
-data.loc[data["lived_in"] == "Wales", "lived_in"] = "United Kingdom"
 
+def get_periods_options(engine):
+    return period_options(engine.data["period"].unique())
 
-def get_periods_options():
-    unique_periods = list(data["period"].unique())
+
+def period_options(unique_periods):
     periods_options = [
         {
             "label": html.Span(
@@ -70,30 +123,30 @@ def get_periods_options():
 
 
 # Obtener cantidad total de dinosaurios
-def get_total_count(periodo):
+def get_total_count(engine, periodo):
     if periodo == "Todos":
-        return len(data)
+        return len(engine.data)
     elif len(periodo):
-        return (data["period"].isin(periodo)).sum()
+        counts = engine.aggregates.key_counts["period"]
+        return sum(counts.get(period, 0) for period in periodo)
     else:
         return 0
 
 
 # Obtener cantidad total de países
-def get_total_country_count(periodo):
+def get_total_country_count(engine, periodo):
     if periodo == "Todos":
-        return len(data.groupby("lived_in"))
+        return len(engine.aggregates.key_counts["lived_in"])
     elif len(periodo):
-        res = data[data["period"].isin(periodo)].groupby("lived_in")
-        return len(res)
+        return len(engine.aggregates.counts("lived_in", periodo))
     else:
         return 0
 
 
 # Obtener cantidad total de periodos
-def get_total_period_count(periodo):
+def get_total_period_count(engine, periodo):
     if periodo == "Todos":
-        return len(data.groupby("period"))
+        return len(engine.aggregates.key_counts["period"])
     elif len(periodo):
         return len(periodo)
     else:
@@ -111,23 +164,36 @@ palette_random = random.sample(palette, len(palette))
 
 
 # Obtener top 10 de dinosaurios por longitud
-def get_dino_top_ten(ascending=False):
-    if ascending:
-        res_data = data.nsmallest(10, "length")
-    else:
-        res_data = data.nlargest(10, "length")
-
-    return res_data.sort_values(by="length", ascending=(not ascending))
+def get_dino_top_ten(engine, ascending=False):
+    # Invertido para que el primero quede arriba en el gráfico de barras
+    return engine.aggregates.top_by_length(10, ascending).iloc[::-1]
 
 
 # Obtener la cantidad de dinosaurios por dieta
-def get_dino_count_by_diet():
-    return data.groupby("diet")["diet"].value_counts().reset_index()
+def get_dino_count_by_diet(engine):
+    return engine.aggregates.counts("diet").reset_index()
+
+
+# Dietas con más de 10 dinosaurios, de la más a la menos frecuente
+def get_box_diets(engine):
+    counts = engine.aggregates.counts("diet")
+    counts = counts.sort_values(ascending=False, kind="stable")
+    return counts[counts > 10].index.tolist()
+
+
+# Filas que muestra el gráfico de longitudes por dieta, para extenderlo
+# solo con las nuevas. Si cambia el snapshot o las dietas se rearma
+def overview_rows(engine):
+    return {
+        "rows": len(engine.data),
+        "stamp": str(engine.snapshot_stamp),
+        "diets": get_box_diets(engine),
+    }
 
 
 # Obtener la cantidad de dinosaurios por periodo
-def get_dino_count_by_period():
-    return data.groupby("period")["period"].value_counts().sort_values().reset_index()
+def get_dino_count_by_period(engine):
+    return engine.aggregates.counts("period").sort_values(kind="stable").reset_index()
 
 
 # Obtener cantidad de dinosaurios por país y agregar el código de país
@@ -170,6 +236,23 @@ iso_data = {
 iso_df = pd.DataFrame.from_dict(iso_data, orient="index").reset_index()
 iso_df.columns = ["lived_in", "country_iso_code"]
 
+# Diagnóstico de memoria (opcional, ver memdiag.py). Cada motor registra
+# sus propias estructuras al construirse
+memdiag.register("iso_df", lambda: iso_df)
+memdiag.init_app(server)
+
+# Coalescencia de ráfagas de callbacks (ver coalesce.py)
+coalesce.init_app(server)
+
+# Exportación en streaming de los datos filtrados (ver export.py)
+export.init_app(server, get_engine)
+
+# API JSON de solo lectura (ver api.py)
+api.init_app(server, lambda dataset: get_engine(dataset).aggregates)
+
+# Ingesta de registros nuevos y actualización desde la fuente (ver ingest.py)
+ingest.init_app(server, get_engine, engines.refresh)
+
 
 def disclaimer():
     return (
@@ -192,19 +275,13 @@ def disclaimer():
 
 
 # Obtener la cantidad de dinosaurios por país
-def get_dino_count_by_country(periodo):
+def get_dino_count_by_country(engine, periodo):
     if periodo:
-        if periodo == "Todos":
-            dino_count_by_country = (
-                data["lived_in"].value_counts().sort_values().reset_index()
-            )
-        elif len(periodo):
-            dino_count_by_country = (
-                data[data["period"].isin(periodo)]["lived_in"]
-                .value_counts()
-                .sort_values()
-                .reset_index()
-            )
+        dino_count_by_country = (
+            engine.aggregates.counts("lived_in", periodo)
+            .sort_values(kind="stable")
+            .reset_index()
+        )
 
         dino_count_by_country = dino_count_by_country.merge(
             iso_df, on="lived_in", how="left"
@@ -225,19 +302,10 @@ def get_dino_count_by_country(periodo):
 
 
 # Obtener top de paises por periodo
-def get_countries_top_ten(periodo):
+def get_countries_top_ten(engine, periodo):
     if periodo:
-        if periodo == "Todos":
-            dino_count_by_country = data["lived_in"].value_counts().reset_index()
-        elif len(periodo):
-            dino_count_by_country = (
-                data[data["period"].isin(periodo)]["lived_in"]
-                .value_counts()
-                .reset_index()
-            )
-
-        res_data = dino_count_by_country.nlargest(10, "count")
-        return res_data.sort_values(by="count", ascending=True)
+        res_data = engine.aggregates.top_counts("lived_in", 10, periodo).reset_index()
+        return res_data.iloc[::-1]
     else:
         return pd.DataFrame({"lived_in": [], "count": []})
 
@@ -290,26 +358,81 @@ app.layout = html.Div(
                         ),
                     ],
                 ),
+                html.Button(
+                    id="btn-timeline",
+                    n_clicks=0,
+                    className=MAIN_BUTTON,
+                    children=[
+                        html.Span(
+                            children=[
+                                html.Span("Línea de ", className="hidden md:inline"),
+                                "Tiempo",
+                            ],
+                            className=MAIN_BUTTON_SPAN,
+                            id="span-timeline",
+                        ),
+                    ],
+                ),
+                html.Button(
+                    id="btn-taxonomy",
+                    n_clicks=0,
+                    className=MAIN_BUTTON,
+                    children=html.Span(
+                        "Taxonomía", className=MAIN_BUTTON_SPAN, id="span-taxonomy"
+                    ),
+                ),
             ],
             className="flex justify-center mt-5",
         ),
+        dcc.Location(id="url"),
+        # Versión de los datos: los gráficos de la página se actualizan cuando
+        # cambia
+        dcc.Interval(
+            id="data-poll",
+            interval=LIVE_UPDATE_MS or 1000,
+            disabled=not LIVE_UPDATE_MS,
+        ),
+        dcc.Store(id="data-version"),
+        dcc.Store(id="page-state"),
+        html.Div(id="dataset-links", className="flex justify-center"),
         html.Div(id="page-content", className="lg:p-10 p-2"),
     ],
 )
 
 
+# Enlaces para cambiar de dataset (solo si hay más de uno)
+def dataset_links(current):
+    if len(datasets.DATASETS) < 2:
+        return []
+    return [
+        html.A(
+            spec["label"],
+            href=f"?dataset={name}",
+            className=(
+                "mx-2 text-lime-300 font-bold underline"
+                if name == current
+                else "mx-2 text-white hover:text-lime-300 hover:underline"
+            ),
+        )
+        for name, spec in datasets.DATASETS.items()
+    ]
+
+
 # Layouts for different pages
-def layout_overview():
+def layout_overview(engine):
     return html.Div(
         [
             disclaimer(),
-            tiles(),
+            html.Div(id="overview-tiles", children=tiles(engine)),
+            dcc.Store(id="overview-rows", data=overview_rows(engine)),
             html.Div(
                 children=[
-                    dcc.Graph(id="grafico-dieta", figure=dino_overview_count_by_diet()),
+                    dcc.Graph(
+                        id="grafico-dieta", figure=dino_overview_count_by_diet(engine)
+                    ),
                     dcc.Graph(
                         id="grafico-dieta-longitud",
-                        figure=dino_overview_length_by_diet(),
+                        figure=dino_overview_length_by_diet(engine),
                     ),
                 ],
                 className="grid xl:grid-cols-2 grid-cols-1 w-screen xl:w-full bg-[#111111] mb-2",
@@ -323,7 +446,7 @@ def layout_overview():
                                 children=[
                                     dcc.Graph(
                                         id="grafico-top-longitud",
-                                        figure=dino_overview_top_by_length(),
+                                        figure=dino_overview_top_by_length(engine),
                                     ),
                                     html.Button(
                                         id="btn-asc-desc",
@@ -339,7 +462,8 @@ def layout_overview():
                         type="circle",
                     ),
                     dcc.Graph(
-                        id="grafico-dieta", figure=dino_overview_count_by_period()
+                        id="grafico-cantidad-periodo",
+                        figure=dino_overview_count_by_period(engine),
                     ),
                 ],
                 className="grid xl:grid-cols-2 grid-cols-1 w-screen xl:w-full bg-[#111111] mb-2 pb-2 pl-2",
@@ -348,7 +472,7 @@ def layout_overview():
                 children=[
                     dcc.Graph(
                         id="grafico-distribucion",
-                        figure=dino_overview_by_country(),
+                        figure=dino_overview_by_country(engine),
                         className="w-full",
                         style={"height": "50vh"},
                     ),
@@ -360,7 +484,7 @@ def layout_overview():
 
 
 # Gráficos de pantalla de periodo
-def layout_periodo():
+def layout_periodo(engine):
     return html.Div(
         children=[
             disclaimer(),
@@ -384,7 +508,7 @@ def layout_periodo():
                     ),
                     dcc.Checklist(
                         id="my-checklist",
-                        options=get_periods_options(),
+                        options=get_periods_options(engine),
                         value=[],
                         className="grid sm:grid-cols-2 lg:grid-cols-3 grid-cols-1 gap-2",
                         labelStyle={"cursor": "pointer"},
@@ -393,65 +517,323 @@ def layout_periodo():
                 ],
                 className="text-white p-6 bg-[#111111] rounded-lg mb-2",
             ),
-            html.Div(id="tiles-container", children=tiles("Todos")),
+            html.Div(id="tiles-container", children=tiles(engine, "Todos")),
             html.Div(
                 children=[
                     dcc.Graph(
-                        id="grafico-periodo-paises", figure=dino_period_by_country()
+                        id="grafico-periodo-paises",
+                        figure=dino_period_by_country(engine),
                     ),
                     dcc.Graph(
-                        id="grafico-top-paises", figure=dino_period_top_countries()
+                        id="grafico-top-paises",
+                        figure=dino_period_top_countries(engine),
                     ),
                 ],
                 className="grid sm:grid-cols-2 grid-cols-1 w-full",
             ),
+            html.Div(id="export-container", children=export_links(engine, "Todos")),
+        ]
+        + (
+            [dcc.Store(id="periodo-data", data=periodo_store(engine))]
+            if PERIODO_CLIENTSIDE
+            else []
+        )
+        + (
+            [
+                dcc.Store(id="periodo-selection", data="Todos"),
+                dcc.Store(id="checklist-debounce-ms", data=CHECKLIST_DEBOUNCE_MS),
+            ]
+            if PERIODO_DEBOUNCE
+            else []
+        ),
+    )
+
+
+# Datos de la página de periodo para los callbacks del cliente
+# (assets/periodo.js): cantidades por periodo x país y códigos ISO
+def periodo_store(engine):
+    table = engine.aggregates.period_counts["lived_in"]
+    return {
+        "dataset": engine.name,
+        "periods": table.index.tolist(),
+        "countries": table.columns.tolist(),
+        "iso": [iso_data.get(country) for country in table.columns],
+        "counts": table.to_numpy().tolist(),
+        "period_totals": engine.aggregates.key_counts["period"],
+        "iso_all": iso_df["country_iso_code"].tolist(),
+        "formats": list(export.FORMATS),
+    }
+
+
+# Enlaces de descarga de la selección actual
+def export_links(engine, periodo, pais=None):
+    if periodo != "Todos" and not len(periodo):
+        return html.P(
+            "Seleccione al menos un periodo para descargar los datos.",
+            className="text-white p-6 bg-[#111111] rounded-lg mt-2",
+        )
+
+    periodos = None if periodo == "Todos" else periodo
+    rows = [("Descargar selección: ", None)]
+    if pais:
+        rows.append((f"Descargar dinosaurios de {pais}: ", pais))
+
+    return html.Div(
+        children=[
+            html.Div(
+                children=[html.Span(label, className="font-semibold mr-2")]
+                + [
+                    html.A(
+                        fmt.upper(),
+                        href=export.export_url(fmt, periodos, row_pais, engine.name),
+                        className="inline-flex items-center p-2 rounded-lg bg-lime-300 text-gray-900 font-semibold me-2 hover:underline",
+                    )
+                    for fmt in export.FORMATS
+                ],
+                className="flex flex-wrap items-center mb-2",
+            )
+            for label, row_pais in rows
         ],
+        className="text-white p-6 bg-[#111111] rounded-lg mt-2",
     )
 
 
 # Gráficos de pantalla de facts
-def layout_facts():
-    data_aux = pd.DataFrame(data)
-
-    max_length_dinosaur = data.loc[data["length"].idxmax()]
-    min_length_dinosaur = data.loc[data["length"].idxmin()]
-    longest_name_dinosaur = data.loc[data["name"].apply(len).idxmax()]
-    shortest_name_dinosaur = data.loc[data["name"].apply(len).idxmin()]
-
-    # Obtener el periodo más antiguo
-    earliest_year = data_aux["full_period"].str.extract(r"(\d+)-\d+")
-    earliest_year.fillna("0", inplace=True)
-    earliest_year = earliest_year.astype(int)
-    data_aux["earliest_year"] = earliest_year
-    oldest_dinosaur = data.loc[data_aux["earliest_year"].idxmax()]
-
-    # Obtener el periodo más reciente
-    earliest_year = data_aux["full_period"].str.extract(r"\d+-(\d+)")
-    earliest_year.fillna("999999", inplace=True)
-    earliest_year = earliest_year.astype(int)
-    data_aux["newest_year"] = earliest_year
-    newest_dinosaur = data.loc[data_aux["newest_year"].idxmin()]
+def layout_facts(engine):
+    return html.Div(
+        children=[
+            disclaimer(),
+            html.Div(
+                id="facts-cards",
+                children=facts_cards(engine),
+                className="grid sm:grid-cols-2 lg:grid-cols-3 grid-cols-1 gap-2",
+            ),
+        ],
+        className="container",
+    )
+
+
+def facts_cards(engine):
+    # Las filas extremas se mantienen en los agregados con cada ingesta
+    titles = {
+        "max_length": "La mayor longitud",
+        "min_length": "La menor longitud",
+        "longest_name": "El nombre más largo",
+        "shortest_name": "El nombre más corto",
+        "oldest": "El más antiguo",
+        "newest": "El más reciente",
+    }
+    extremes = engine.aggregates.extremes
+    return [
+        dino_card(title, engine.data.iloc[extremes[key][1]])
+        for key, title in titles.items()
+        if key in extremes
+    ]
+
+
+# Pantalla de línea de tiempo. Los sliders usan -Ma para que el tiempo
+# avance de izquierda a derecha
+def layout_timeline(engine):
+    oldest, newest, marks = timeline_bounds(engine)
+    # Sin intervalos reconocibles la curva está vacía y no hay máximo
+    counts = engine.timeline_counts
+    default_ma = float(counts.idxmax()) if len(counts) else 0.0
 
     return html.Div(
         children=[
             disclaimer(),
             html.Div(
                 children=[
-                    dino_card("La mayor longitud", max_length_dinosaur),
-                    dino_card("La menor longitud", min_length_dinosaur),
-                    dino_card("El nombre más largo", longest_name_dinosaur),
-                    dino_card("El nombre más corto", shortest_name_dinosaur),
-                    dino_card("El más antiguo", oldest_dinosaur),
-                    dino_card("El más reciente", newest_dinosaur),
+                    html.P(
+                        id="timeline-label",
+                        children=timeline_label(engine, default_ma),
+                        className="mb-4 text-lg",
+                    ),
+                    dcc.Slider(
+                        id="time-slider",
+                        persistence=True,
+                        persistence_type="memory",
+                        min=-oldest,
+                        max=-newest,
+                        step=TIMELINE_STEP_MA,
+                        value=-default_ma,
+                        marks=marks,
+                        included=False,
+                        updatemode="drag",
+                    ),
                 ],
-                className="grid sm:grid-cols-2 lg:grid-cols-3 grid-cols-1 gap-2",
+                className="text-white p-6 bg-[#111111] rounded-lg mb-2",
+            ),
+            dcc.Graph(
+                id="grafico-linea-tiempo", figure=dino_timeline(engine, default_ma)
+            ),
+            html.Div(
+                children=[
+                    html.P(
+                        "Dinosaurios que vivieron en el rango seleccionado",
+                        className="mb-4 text-lg",
+                    ),
+                    dcc.RangeSlider(
+                        id="time-range",
+                        persistence=True,
+                        persistence_type="memory",
+                        min=-oldest,
+                        max=-newest,
+                        step=TIMELINE_STEP_MA,
+                        value=[-(default_ma + 5), -(default_ma - 5)],
+                        marks=marks,
+                        allowCross=False,
+                    ),
+                    html.Div(
+                        id="timeline-overlap",
+                        children=timeline_overlap(
+                            engine, default_ma + 5, default_ma - 5
+                        ),
+                    ),
+                ],
+                className="text-white p-6 bg-[#111111] rounded-lg mt-2",
+            ),
+        ],
+    )
+
+
+# Extremos de los sliders (en Ma) y marcas cada 25 Ma
+def timeline_bounds(engine):
+    if not len(engine.timeline_counts):
+        return 0.0, 0.0, {}
+    oldest = float(engine.timeline_counts.index.max())
+    newest = float(engine.timeline_counts.index.min())
+    marks = {
+        -ma: {"label": f"{ma} Ma", "style": {"color": "#ffffff"}}
+        for ma in range(int(oldest) // 25 * 25, int(newest), -25)
+        if newest <= ma <= oldest
+    }
+    return oldest, newest, marks
+
+
+def timeline_label(engine, ma):
+    # La grilla ya tiene los conteos; solo se cuenta fuera de ella
+    count = engine.timeline_counts.get(ma)
+    if count is None:
+        count = engine.time_index.count_alive(ma)
+    count = int(count)
+    return [
+        f"Hace {ma:g} millones de años vivían ",
+        html.Span(f"{count} dinosaurios", className="text-lime-300 font-bold"),
+    ]
+
+
+# Dinosaurios cuyo intervalo se solapa con [newest, oldest]
+def timeline_overlap(engine, oldest, newest, limit=60):
+    positions = engine.time_index.overlapping(newest, oldest)
+    rows = engine.data.take(positions).sort_values(by="start_ma", ascending=False)
+    return [
+        html.P(
+            f"{len(positions)} dinosaurios entre {oldest:g} y {newest:g} Ma"
+            + (f" (se muestran {limit})" if len(positions) > limit else ""),
+            className="mt-6 mb-2 font-semibold",
+        ),
+        html.Ul(
+            children=[
+                html.Li(
+                    children=[
+                        html.Span(row["name"], className="text-lime-300 font-semibold"),
+                        f" {row['start_ma']:g}-{row['end_ma']:g} Ma",
+                    ]
+                )
+                for _, row in rows.head(limit).iterrows()
+            ],
+            className="grid sm:grid-cols-2 lg:grid-cols-3 grid-cols-1 gap-1",
+        ),
+    ]
+
+
+# Pantalla de taxonomía
+def layout_taxonomy(engine):
+    return html.Div(
+        children=[
+            disclaimer(),
+            html.Div(
+                children=[
+                    dcc.RadioItems(
+                        id="taxonomy-chart-type",
+                        persistence=True,
+                        persistence_type="memory",
+                        options=[
+                            {
+                                "label": html.Span(
+                                    label,
+                                    className="ml-2 mr-4 hover:text-lime-300 hover:underline",
+                                ),
+                                "value": value,
+                            }
+                            for label, value in [
+                                ("Sunburst", "sunburst"),
+                                ("Treemap", "treemap"),
+                            ]
+                        ],
+                        value="sunburst",
+                        inline=True,
+                        labelStyle={"cursor": "pointer"},
+                        inputStyle={"cursor": "pointer"},
+                    ),
+                    html.Button(
+                        id="btn-taxonomy-up",
+                        n_clicks=0,
+                        className="relative inline-flex items-center justify-center p-1 bg-lime-300 overflow-hidden text-gray-900 font-semibold rounded-lg focus:ring-4 focus:outline-none hover:ring-4",
+                        children=html.Span("Subir un nivel ⬆️"),
+                    ),
+                ],
+                className="flex flex-wrap items-center justify-between gap-2 text-white p-6 bg-[#111111] rounded-lg mb-2",
+            ),
+            dcc.Store(id="taxonomy-root", data=TAXONOMY_ROOT),
+            html.Div(
+                id="taxonomy-stats",
+                children=taxonomy_stats(engine, TAXONOMY_ROOT),
+            ),
+            dcc.Graph(
+                id="grafico-taxonomia",
+                figure=dino_taxonomy(engine, TAXONOMY_ROOT),
+                style={"height": "70vh"},
             ),
         ],
-        className="container",
     )
 
 
-def tiles(periodo="Todos"):
+# Linaje y estadísticas del nodo seleccionado
+def taxonomy_stats(engine, root):
+    node = engine.taxonomy.node(root)
+    lineage = root.split("/") if root != TAXONOMY_ROOT else []
+
+    def tile(text):
+        return html.Div(html.Span(text), className=TILE)
+
+    def meters(value):
+        return "-" if np.isnan(value) else f"{value:.1f} m"
+
+    return html.Div(
+        children=[
+            html.P(
+                " › ".join([TAXONOMY_ROOT] + lineage),
+                className="text-white mb-2 font-semibold",
+            ),
+            html.Div(
+                children=[
+                    tile(f"{node['count']} dinosaurios"),
+                    tile(f"{node['children']} subgrupos"),
+                    tile(f"Longitud media: {meters(node['length_mean'])}"),
+                    tile(
+                        f"Rango: {meters(node['length_min'])} - "
+                        f"{meters(node['length_max'])}"
+                    ),
+                ],
+                className="grid sm:grid-cols-4 grid-cols-2 w-full",
+            ),
+        ],
+    )
+
+
+def tiles(engine, periodo="Todos"):
     return html.Div(
         children=[
             html.Div(
@@ -462,7 +844,10 @@ def tiles(periodo="Todos"):
                                 src=app.get_asset_url("icons8-dino-67.png"),
                                 className="mx-auto sm:w-14 sm:h-14 w-10 h-10 mb-2",
                             ),
-                            html.Span(f"{get_total_count(periodo)} dinosaurios"),
+                            html.Span(
+                                f"{get_total_count(engine, periodo)} dinosaurios",
+                                id="tile-dinosaurios",
+                            ),
                         ],
                         className="text-center",
                     )
@@ -477,7 +862,10 @@ def tiles(periodo="Todos"):
                                 src=app.get_asset_url("icons8-earth-100.png"),
                                 className="mx-auto sm:w-14 sm:h-14 w-10 h-10 mb-2",
                             ),
-                            html.Span(f"{get_total_country_count(periodo)} países"),
+                            html.Span(
+                                f"{get_total_country_count(engine, periodo)} países",
+                                id="tile-paises",
+                            ),
                         ],
                         className="text-center",
                     )
@@ -492,7 +880,10 @@ def tiles(periodo="Todos"):
                                 src=app.get_asset_url("icons8-rock-100.png"),
                                 className="mx-auto sm:w-14 sm:h-14 w-10 h-10 mb-2",
                             ),
-                            html.Span(f"{get_total_period_count(periodo)} periodos"),
+                            html.Span(
+                                f"{get_total_period_count(engine, periodo)} periodos",
+                                id="tile-periodos",
+                            ),
                         ],
                         className="text-center",
                     )
@@ -603,8 +994,8 @@ def dino_card(title, row):
 
 
 # Cantidad de dinosaurios por tipo de dieta
-def dino_overview_count_by_diet():
-    dino_count = get_dino_count_by_diet()
+def dino_overview_count_by_diet(engine):
+    dino_count = get_dino_count_by_diet(engine)
 
     fig = go.Figure(
         data=[
@@ -631,22 +1022,16 @@ def dino_overview_count_by_diet():
 
 
 # Longitud de dinosaurios por tipo de dieta
-def dino_overview_length_by_diet():
-    unique_diets = (
-        data.groupby("diet")["diet"]
-        .value_counts()
-        .sort_values(ascending=False)
-        .reset_index()
-    )
-    unique_diets = unique_diets[unique_diets["count"] > 10]["diet"]
-
+def dino_overview_length_by_diet(engine):
     fig = go.Figure()
 
-    for i, diet in enumerate(unique_diets):
+    for i, diet in enumerate(get_box_diets(engine)):
+        lengths = engine.data.loc[engine.data["diet"] == diet, "length"].dropna()
         fig.add_trace(
             go.Box(
-                x=data[data["diet"] == diet]["diet"],
-                y=data[data["diet"] == diet]["length"],
+                # Listas y no arreglos, para poder extenderlas con Patch
+                x=[diet] * len(lengths),
+                y=lengths.tolist(),
                 name=diet,
                 marker_color=palette_random[i % len(palette_random)],
             )
@@ -668,8 +1053,8 @@ def dino_overview_length_by_diet():
 
 
 # Top de Dinosaurios por Longitud
-def dino_overview_top_by_length(ascending=False):
-    dino_top_ten = get_dino_top_ten(ascending)
+def dino_overview_top_by_length(engine, ascending=False):
+    dino_top_ten = get_dino_top_ten(engine, ascending)
 
     fig1 = go.Bar(
         x=dino_top_ten["length"],
@@ -700,8 +1085,8 @@ def dino_overview_top_by_length(ascending=False):
 
 
 # Gráficos de la pantalla de Overview
-def dino_overview_by_country():
-    dino_count_by_country = get_dino_count_by_country("Todos")
+def dino_overview_by_country(engine):
+    dino_count_by_country = get_dino_count_by_country(engine, "Todos")
     # Distribución Geográfica de los Dinosaurios
     fig1 = go.Choropleth(
         locations=dino_count_by_country["country_iso_code"],
@@ -738,8 +1123,8 @@ def dino_overview_by_country():
 
 
 #  Cantidad de dinosaurios por periodo
-def dino_overview_count_by_period():
-    dino_count = get_dino_count_by_period()
+def dino_overview_count_by_period(engine):
+    dino_count = get_dino_count_by_period(engine)
 
     fig1 = go.Bar(
         x=dino_count["period"],
@@ -769,8 +1154,8 @@ def dino_overview_count_by_period():
 
 
 # Distribución Geográfica de los Dinosaurios por periodo
-def dino_period_by_country(periodo="Todos"):
-    dino_count_by_country = get_dino_count_by_country(periodo)
+def dino_period_by_country(engine, periodo="Todos"):
+    dino_count_by_country = get_dino_count_by_country(engine, periodo)
 
     fig1 = go.Scattergeo(
         locations=dino_count_by_country["country_iso_code"],
@@ -807,8 +1192,8 @@ def dino_period_by_country(periodo="Todos"):
 
 
 # Top de países por periodo
-def dino_period_top_countries(periodo="Todos"):
-    dino_top_ten = get_countries_top_ten(periodo)
+def dino_period_top_countries(engine, periodo="Todos"):
+    dino_top_ten = get_countries_top_ten(engine, periodo)
 
     fig1 = go.Bar(
         x=dino_top_ten["count"],
@@ -836,109 +1221,500 @@ def dino_period_top_countries(periodo="Todos"):
     return fig
 
 
-# Callback to handle button clicks and update the page content
+# Cantidad de dinosaurios vivos a lo largo del tiempo
+def dino_timeline(engine, ma):
+    fig1 = go.Scatter(
+        x=engine.timeline_counts.index,
+        y=engine.timeline_counts.values,
+        mode="lines",
+        fill="tozeroy",
+        line_color=palette[2],
+        hovertemplate="%{x} Ma: %{y}<extra></extra>",
+    )
+
+    fig = go.Figure(
+        data=[fig1],
+    )
+
+    fig.add_vline(x=ma, line_color="#bef264", line_width=2)
+
+    fig.update_layout(
+        title="Dinosaurios Vivos por Millón de Años",
+        plot_bgcolor=bg_color,
+        paper_bgcolor=bg_color,
+        font_color="#ffffff",
+        xaxis_title="Millones de años atrás",
+        yaxis_title="Cantidad",
+        xaxis_autorange="reversed",
+        xaxis_fixedrange=True,
+        yaxis_fixedrange=True,
+    )
+
+    return fig
+
+
+# Jerarquía taxonómica a partir del nodo seleccionado
+def dino_taxonomy(engine, root, chart_type="sunburst"):
+    subtree = engine.taxonomy.subtree(root, TAXONOMY_DEPTH)
+    trace = go.Sunburst if chart_type == "sunburst" else go.Treemap
+
+    fig1 = trace(
+        ids=subtree["ids"],
+        labels=subtree["labels"],
+        parents=subtree["parents"],
+        values=subtree["values"],
+        level=root,
+        branchvalues="total",
+        customdata=subtree["length_mean"],
+        hovertemplate="<b>%{label}</b><br>%{value} dinosaurios<br>"
+        "Longitud media: %{customdata} m<extra></extra>",
+        marker=dict(
+            colors=subtree["length_mean"],
+            colorscale=palette,
+            colorbar=dict(title="Longitud media (m)"),
+        ),
+    )
+
+    fig = go.Figure(
+        data=[fig1],
+    )
+
+    fig.update_layout(
+        title="Taxonomía",
+        plot_bgcolor=bg_color,
+        paper_bgcolor=bg_color,
+        font_color="#ffffff",
+        margin=dict(l=0, r=0, t=50, b=0),
+    )
+
+    return fig
+
+
+# Páginas: botón -> (span del botón, layout)
+PAGES = {
+    "btn-overview": ("span-overview", layout_overview),
+    "btn-periodo": ("span-periodo", layout_periodo),
+    "btn-facts": ("span-facts", layout_facts),
+    "btn-timeline": ("span-timeline", layout_timeline),
+    "btn-taxonomy": ("span-taxonomy", layout_taxonomy),
+}
+
+
+# Callback to handle button clicks and update the page content. La página
+# no se vuelve a armar cuando cambian los datos: los callbacks de cada una
+# escuchan data-version y actualizan solo sus gráficos, sin perder el estado
+@app.callback(
+    [Output("page-content", "children")]
+    + [Output(span_id, "className") for span_id, _ in PAGES.values()]
+    + [Output("page-state", "data")],
+    [Input(button_id, "n_clicks") for button_id in PAGES],
+    [State("url", "search")],
+)
+def display_page(*args):
+    search = args[-1]
+    engine = get_engine_from_search(search)
+    ctx = dash.callback_context
+    if not ctx.triggered:
+        button_id = "btn-overview"
+    else:
+        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
+
+    _, layout = PAGES[button_id]
+    return (
+        [layout(engine)]
+        + [
+            SELECTED_MAIN_BUTTON_SPAN if other == button_id else MAIN_BUTTON_SPAN
+            for other in PAGES
+        ]
+        + [{"page": button_id, "version": engine.aggregates.version}]
+    )
+
+
+# Consultar si cambió la versión de los datos (por ejemplo por una ingesta)
 @app.callback(
+    Output("data-version", "data"),
+    [Input("data-poll", "n_intervals")],
     [
-        Output("page-content", "children"),
-        Output("span-overview", "className"),
-        Output("span-periodo", "className"),
-        Output("span-facts", "className"),
+        State("data-version", "data"),
+        State("page-state", "data"),
+        State("url", "search"),
     ],
+    prevent_initial_call=True,
+)
+def poll_data_version(n_intervals, current, page_state, search):
+    version = get_engine_from_search(search).aggregates.version
+    seen = current or (page_state or {}).get("version")
+    if seen is None or seen == version:
+        raise PreventUpdate
+    return version
+
+
+# Página de periodo con datos nuevos: se reemplaza solo el store del cliente
+if PERIODO_CLIENTSIDE:
+
+    @app.callback(
+        Output("periodo-data", "data"),
+        [Input("data-version", "data")],
+        [State("url", "search")],
+        prevent_initial_call=True,
+    )
+    def update_periodo_data(version, search):
+        return periodo_store(get_engine_from_search(search))
+
+
+# Overview con datos nuevos: se reemplazan los datos de las trazas con los
+# agregados, y al gráfico de longitudes se le agregan solo las filas nuevas
+@app.callback(
     [
-        Input("btn-overview", "n_clicks"),
-        Input("btn-periodo", "n_clicks"),
-        Input("btn-facts", "n_clicks"),
+        Output("overview-tiles", "children"),
+        Output("grafico-dieta", "figure"),
+        Output("grafico-dieta-longitud", "figure"),
+        Output("grafico-cantidad-periodo", "figure"),
+        Output("grafico-distribucion", "figure"),
+        Output("overview-rows", "data"),
     ],
+    [Input("data-version", "data")],
+    [State("overview-rows", "data"), State("url", "search")],
+    prevent_initial_call=True,
 )
-def display_page(n_clicks_overview, n_clicks_periodo, n_clicks_facts):
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        return (
-            layout_overview(),
-            SELECTED_MAIN_BUTTON_SPAN,
-            MAIN_BUTTON_SPAN,
-            MAIN_BUTTON_SPAN,
-        )
+def refresh_overview(version, seen, search):
+    engine = get_engine_from_search(search)
+
+    dino_count = get_dino_count_by_diet(engine)
+    diet = Patch()
+    diet["data"][0]["labels"] = dino_count["diet"].tolist()
+    diet["data"][0]["values"] = dino_count["count"].tolist()
+
+    seen = seen or {}
+    current = overview_rows(engine)
+    length = Patch()
+    if (
+        seen.get("stamp") == current["stamp"]
+        and seen.get("diets") == current["diets"]
+        and seen.get("rows", 0) <= current["rows"]
+    ):
+        rows = engine.data.iloc[seen["rows"] :]
+        for i, name in enumerate(current["diets"]):
+            lengths = rows.loc[rows["diet"] == name, "length"].dropna().tolist()
+            if lengths:
+                length["data"][i]["x"].extend([name] * len(lengths))
+                length["data"][i]["y"].extend(lengths)
     else:
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        if button_id == "btn-overview":
-            return (
-                layout_overview(),
-                SELECTED_MAIN_BUTTON_SPAN,
-                MAIN_BUTTON_SPAN,
-                MAIN_BUTTON_SPAN,
-            )
-        elif button_id == "btn-periodo":
-            return (
-                layout_periodo(),
-                MAIN_BUTTON_SPAN,
-                SELECTED_MAIN_BUTTON_SPAN,
-                MAIN_BUTTON_SPAN,
-            )
-        elif button_id == "btn-facts":
-            return (
-                layout_facts(),
-                MAIN_BUTTON_SPAN,
-                MAIN_BUTTON_SPAN,
-                SELECTED_MAIN_BUTTON_SPAN,
-            )
+        length["data"] = dino_overview_length_by_diet(engine).to_plotly_json()["data"]
+
+    dino_count = get_dino_count_by_period(engine)
+    period = Patch()
+    period["data"][0]["x"] = dino_count["period"].tolist()
+    period["data"][0]["y"] = dino_count["count"].tolist()
+
+    dino_count = get_dino_count_by_country(engine, "Todos")
+    country = Patch()
+    country["data"][0]["locations"] = dino_count["country_iso_code"].tolist()
+    country["data"][0]["z"] = dino_count["count"].tolist()
+    country["data"][0]["text"] = dino_count["lived_in"].tolist()
+
+    return tiles(engine), diet, length, period, country, current
+
+
+# Página de periodo con datos nuevos: los periodos nuevos se agregan al
+# checklist y, si estaban todos seleccionados, quedan seleccionados
+@app.callback(
+    [
+        Output("my-checklist", "options"),
+        Output("my-checklist", "value", allow_duplicate=True),
+    ],
+    [Input("data-version", "data")],
+    [
+        State("my-checklist", "options"),
+        State("all-or-none", "value"),
+        State("url", "search"),
+    ],
+    prevent_initial_call=True,
+)
+def update_periods_options(version, options, all_selected, search):
+    # Solo se agregan al final los periodos que todavía no están
+    engine = get_engine_from_search(search)
+    known = {option["value"] for option in options}
+    new_periods = [p for p in engine.aggregates.key_counts["period"] if p not in known]
+    if not new_periods:
+        raise PreventUpdate
+    options = options + period_options(new_periods)
+    if "Todos" not in (all_selected or []):
+        return options, dash.no_update
+    return options, [option["value"] for option in options]
+
+
+@app.callback(
+    Output("facts-cards", "children"),
+    [Input("data-version", "data")],
+    [State("url", "search")],
+    prevent_initial_call=True,
+)
+def refresh_facts(version, search):
+    return facts_cards(get_engine_from_search(search))
 
 
 @app.callback(
     Output("grafico-top-longitud", "figure"),
     Output("btn-asc-desc", "children"),
     Input("btn-asc-desc", "n_clicks"),
+    Input("data-version", "data"),
+    State("url", "search"),
 )
-def update_top_longitud(n_clicks):
+def update_top_longitud(n_clicks, version, search):
+    engine = get_engine_from_search(search)
     ascending = n_clicks % 2 == 1
-    figure = dino_overview_top_by_length(ascending)
+    dino_top_ten = get_dino_top_ten(engine, ascending)
+
+    # Solo se reemplazan los datos de la traza, el layout no cambia
+    figure = Patch()
+    figure["data"][0]["x"] = dino_top_ten["length"].tolist()
+    figure["data"][0]["y"] = dino_top_ten["name"].tolist()
     button_text = (
         "Cambiar a Top Descendente ⬇️" if ascending else "Cambiar a Top Ascendente ⬆️"
     )
     return figure, button_text
 
 
-@app.callback(
-    [Output("my-checklist", "value"), Output("all-or-none", "value")],
-    [Input("all-or-none", "value"), Input("my-checklist", "value")],
-    [State("my-checklist", "options")],
-)
-def update_checklists(all_selected, selected_values, options):
-    ctx = dash.callback_context
+# Página de periodo: los checklists filtran en el navegador o en el servidor
+if PERIODO_CLIENTSIDE:
+    app.clientside_callback(
+        ClientsideFunction("periodo", "update_checklists"),
+        [Output("my-checklist", "value"), Output("all-or-none", "value")],
+        [Input("all-or-none", "value"), Input("my-checklist", "value")],
+        [State("my-checklist", "options")],
+    )
 
-    if not ctx.triggered:
-        return [[option["value"] for option in options], ["Todos"]]
+    app.clientside_callback(
+        ClientsideFunction("periodo", "update_tiles"),
+        [
+            Output("tile-dinosaurios", "children"),
+            Output("tile-paises", "children"),
+            Output("tile-periodos", "children"),
+        ],
+        [Input("my-checklist", "value"), Input("periodo-data", "data")],
+    )
 
-    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    app.clientside_callback(
+        ClientsideFunction("periodo", "update_map"),
+        Output("grafico-periodo-paises", "figure"),
+        [Input("my-checklist", "value"), Input("periodo-data", "data")],
+        [State("grafico-periodo-paises", "figure")],
+    )
 
-    if triggered_id == "all-or-none":
-        if "Todos" in all_selected:
+    app.clientside_callback(
+        ClientsideFunction("periodo", "update_top_countries"),
+        Output("grafico-top-paises", "figure"),
+        [Input("my-checklist", "value"), Input("periodo-data", "data")],
+        [State("grafico-top-paises", "figure")],
+    )
+
+    app.clientside_callback(
+        ClientsideFunction("periodo", "update_export_links"),
+        Output("export-container", "children"),
+        [
+            Input("my-checklist", "value"),
+            Input("grafico-periodo-paises", "clickData"),
+            Input("periodo-data", "data"),
+        ],
+    )
+
+else:
+    if PERIODO_DEBOUNCE:
+        app.clientside_callback(
+            ClientsideFunction("periodo", "debounce_selection"),
+            Output("periodo-selection", "data"),
+            [Input("my-checklist", "value")],
+            [State("checklist-debounce-ms", "data")],
+        )
+
+    @app.callback(
+        [Output("my-checklist", "value"), Output("all-or-none", "value")],
+        [Input("all-or-none", "value"), Input("my-checklist", "value")],
+        [State("my-checklist", "options")],
+    )
+    def update_checklists(all_selected, selected_values, options):
+        ctx = dash.callback_context
+
+        if not ctx.triggered:
             return [[option["value"] for option in options], ["Todos"]]
-        else:
-            return [[], []]
 
-    elif triggered_id == "my-checklist":
-        if len(selected_values) == len(options):
-            return [selected_values, ["Todos"]]
-        else:
-            return [selected_values, []]
+        triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
+
+        if triggered_id == "all-or-none":
+            if "Todos" in all_selected:
+                return [[option["value"] for option in options], ["Todos"]]
+            else:
+                return [[], []]
+
+        elif triggered_id == "my-checklist":
+            if len(selected_values) == len(options):
+                return [selected_values, ["Todos"]]
+            else:
+                return [selected_values, []]
+
+    @app.callback(
+        Output("tiles-container", "children"),
+        [PERIODO_INPUT, Input("data-version", "data")],
+        [State("url", "search")],
+    )
+    def update_tiles(selected_periods, version, search):
+        engine = get_engine_from_search(search)
+        return tiles(engine, selected_periods)
+
+    @app.callback(
+        Output("grafico-periodo-paises", "figure"),
+        [PERIODO_INPUT, Input("data-version", "data")],
+        [State("url", "search")],
+    )
+    def update_graph(selected_periods, version, search):
+        engine = get_engine_from_search(search)
+        dino_count_by_country = get_dino_count_by_country(engine, selected_periods)
+
+        figure = Patch()
+        figure["data"][0]["locations"] = dino_count_by_country[
+            "country_iso_code"
+        ].tolist()
+        figure["data"][0]["marker"]["size"] = dino_count_by_country[
+            "scaled_count"
+        ].tolist()
+        figure["data"][0]["text"] = dino_count_by_country["count"].tolist()
+        return figure
+
+    @app.callback(
+        Output("grafico-top-paises", "figure"),
+        [PERIODO_INPUT, Input("data-version", "data")],
+        [State("url", "search")],
+    )
+    def update_graph(selected_periods, version, search):
+        engine = get_engine_from_search(search)
+        dino_top_ten = get_countries_top_ten(engine, selected_periods)
 
+        figure = Patch()
+        figure["data"][0]["x"] = dino_top_ten["count"].tolist()
+        figure["data"][0]["y"] = dino_top_ten["lived_in"].tolist()
+        return figure
 
-@app.callback(Output("tiles-container", "children"), [Input("my-checklist", "value")])
-def update_tiles(selected_periods):
-    return tiles(selected_periods)
+    @app.callback(
+        Output("export-container", "children"),
+        [
+            PERIODO_INPUT,
+            Input("grafico-periodo-paises", "clickData"),
+            Input("data-version", "data"),
+        ],
+        [State("url", "search")],
+    )
+    def update_export_links(selected_periods, click_data, version, search):
+        engine = get_engine_from_search(search)
+        pais = None
+        if click_data:
+            iso_code = click_data["points"][0].get("location")
+            match = iso_df.loc[iso_df["country_iso_code"] == iso_code, "lived_in"]
+            pais = match.iloc[0] if len(match) else None
+        return export_links(engine, selected_periods, pais)
 
 
 @app.callback(
-    Output("grafico-periodo-paises", "figure"), [Input("my-checklist", "value")]
+    [Output("timeline-label", "children"), Output("grafico-linea-tiempo", "figure")],
+    [Input("time-slider", "value"), Input("data-version", "data")],
+    [State("url", "search")],
 )
-def update_graph(selected_periods):
-    return dino_period_by_country(selected_periods)
+def update_timeline(value, version, search):
+    engine = get_engine_from_search(search)
+    # Solo se mueve la línea vertical, y con datos nuevos la curva
+    figure = Patch()
+    figure["layout"]["shapes"][0]["x0"] = -value
+    figure["layout"]["shapes"][0]["x1"] = -value
+    if dash.callback_context.triggered_id == "data-version":
+        figure["data"][0]["x"] = engine.timeline_counts.index.tolist()
+        figure["data"][0]["y"] = engine.timeline_counts.tolist()
+    return timeline_label(engine, -value), figure
+
+
+# Con datos nuevos el rango de los sliders puede crecer; el valor elegido
+# se mantiene
+@app.callback(
+    [
+        Output("time-slider", "min"),
+        Output("time-slider", "max"),
+        Output("time-slider", "marks"),
+        Output("time-range", "min"),
+        Output("time-range", "max"),
+        Output("time-range", "marks"),
+    ],
+    [Input("data-version", "data")],
+    [State("url", "search")],
+    prevent_initial_call=True,
+)
+def update_timeline_bounds(version, search):
+    oldest, newest, marks = timeline_bounds(get_engine_from_search(search))
+    return [-oldest, -newest, marks] * 2
 
 
-@app.callback(Output("grafico-top-paises", "figure"), [Input("my-checklist", "value")])
-def update_graph(selected_periods):
-    return dino_period_top_countries(selected_periods)
+@app.callback(
+    Output("timeline-overlap", "children"),
+    [Input("time-range", "value"), Input("data-version", "data")],
+    [State("url", "search")],
+)
+def update_timeline_overlap(value, version, search):
+    engine = get_engine_from_search(search)
+    return timeline_overlap(engine, -value[0], -value[1])
+
+
+@app.callback(
+    Output("taxonomy-root", "data"),
+    [
+        Input("grafico-taxonomia", "clickData"),
+        Input("btn-taxonomy-up", "n_clicks"),
+    ],
+    [State("taxonomy-root", "data"), State("url", "search")],
+    prevent_initial_call=True,
+)
+def update_taxonomy_root(click_data, n_clicks, root, search):
+    engine = get_engine_from_search(search)
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
+
+    if triggered_id == "grafico-taxonomia" and click_data:
+        node_id = click_data["points"][0].get("id", root)
+        # Al hacer click en el centro se vuelve al nivel anterior
+        if node_id != root:
+            return node_id
+    return engine.taxonomy.parent_id(root)
+
+
+@app.callback(
+    [Output("grafico-taxonomia", "figure"), Output("taxonomy-stats", "children")],
+    [
+        Input("taxonomy-root", "data"),
+        Input("taxonomy-chart-type", "value"),
+        Input("data-version", "data"),
+    ],
+    [State("url", "search")],
+    prevent_initial_call=True,
+)
+def update_taxonomy(root, chart_type, version, search):
+    engine = get_engine_from_search(search)
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
+    if triggered_id == "taxonomy-chart-type":
+        return dino_taxonomy(engine, root, chart_type), taxonomy_stats(engine, root)
+
+    # Bajar o subir de nivel, o recibir datos nuevos, solo reemplaza los
+    # arreglos de la traza con el subárbol precalculado
+    subtree = engine.taxonomy.subtree(root, TAXONOMY_DEPTH)
+    figure = Patch()
+    for key in ("ids", "labels", "parents", "values"):
+        figure["data"][0][key] = subtree[key]
+    figure["data"][0]["customdata"] = subtree["length_mean"]
+    figure["data"][0]["marker"]["colors"] = subtree["length_mean"]
+    figure["data"][0]["level"] = root
+    return figure, taxonomy_stats(engine, root)
+
+
+@app.callback(Output("dataset-links", "children"), [Input("url", "search")])
+def update_dataset_links(search):
+    return dataset_links(get_engine_from_search(search).name)
 
 
 # Run the app
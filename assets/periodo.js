@@ -0,0 +1,200 @@
+// Callbacks del lado del cliente para la página de periodo.
+//
+// Se usan cuando DINOSOURCE_PERIODO_CLIENTSIDE está activo: la página trae
+// en el store "periodo-data" la matriz de cantidades periodo x país y todo
+// lo que depende de los periodos seleccionados se calcula en el navegador,
+// con la misma lógica que las funciones get_* de app.py. Con el filtrado en
+// el servidor solo se usa debounce_selection
+// (DINOSOURCE_CHECKLIST_DEBOUNCE_MS).
+
+(function () {
+    // Cantidad por país para los periodos seleccionados (solo países > 0),
+    // en el orden de las columnas de la matriz
+    function countsByCountry(store, selected) {
+        var rows = new Set(selected);
+        var totals = store.countries.map(function () {
+            return 0;
+        });
+        store.periods.forEach(function (period, i) {
+            if (rows.has(period)) {
+                store.counts[i].forEach(function (count, j) {
+                    totals[j] += count;
+                });
+            }
+        });
+        var res = [];
+        totals.forEach(function (count, j) {
+            if (count > 0) {
+                res.push({ country: store.countries[j], iso: store.iso[j], count: count });
+            }
+        });
+        return res;
+    }
+
+    // Copia de la figura con la primera traza actualizada
+    function withTrace(figure, changes) {
+        var trace = Object.assign({}, figure.data[0], changes);
+        return Object.assign({}, figure, { data: [trace].concat(figure.data.slice(1)) });
+    }
+
+    function exportUrl(fmt, periodos, pais, dataset) {
+        var params = new URLSearchParams();
+        periodos.forEach(function (p) {
+            params.append("periodo", p);
+        });
+        if (pais) {
+            params.append("pais", pais);
+        }
+        if (dataset) {
+            params.append("dataset", dataset);
+        }
+        var query = params.toString();
+        return "/export/" + fmt + (query ? "?" + query : "");
+    }
+
+    function component(type, props) {
+        return { type: type, namespace: "dash_html_components", props: props };
+    }
+
+    // Última selección pedida, para el debounce de los checklists
+    var latestSelection = null;
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        periodo: {
+            // Pasa la selección a "periodo-selection" recién cuando no cambió
+            // durante `delay` ms, así una ráfaga de clicks es una sola request
+            debounce_selection: function (selected, delay) {
+                var token = {};
+                latestSelection = token;
+                return new Promise(function (resolve) {
+                    setTimeout(function () {
+                        resolve(latestSelection === token ? selected : dash_clientside.no_update);
+                    }, delay);
+                });
+            },
+
+            // Sincroniza "Seleccionar/Deseleccionar Todos" con la lista
+            update_checklists: function (allSelected, selectedValues, options) {
+                var all = options.map(function (option) {
+                    return option.value;
+                });
+                var triggered = dash_clientside.callback_context.triggered;
+                var triggeredId = triggered.length ? triggered[0].prop_id.split(".")[0] : null;
+
+                if (!triggeredId) {
+                    return [all, ["Todos"]];
+                }
+                if (triggeredId === "all-or-none") {
+                    return allSelected.indexOf("Todos") >= 0 ? [all, ["Todos"]] : [[], []];
+                }
+                return [selectedValues, selectedValues.length === options.length ? ["Todos"] : []];
+            },
+
+            update_tiles: function (selected, store) {
+                var total = selected.reduce(function (acc, period) {
+                    return acc + (store.period_totals[period] || 0);
+                }, 0);
+                var countries = countsByCountry(store, selected).length;
+                return [
+                    total + " dinosaurios",
+                    countries + " países",
+                    selected.length + " periodos",
+                ];
+            },
+
+            // Mapa de burbujas; el tamaño se escala como MinMaxScaler + 1, x 20
+            update_map: function (selected, store, figure) {
+                if (!selected.length) {
+                    return withTrace(figure, {
+                        locations: store.iso_all,
+                        marker: Object.assign({}, figure.data[0].marker, {
+                            size: store.iso_all.map(function () {
+                                return 0;
+                            }),
+                        }),
+                        text: store.iso_all.map(function () {
+                            return 0;
+                        }),
+                    });
+                }
+
+                var res = countsByCountry(store, selected).sort(function (a, b) {
+                    return a.count - b.count;
+                });
+                var counts = res.map(function (row) {
+                    return row.count;
+                });
+                var min = Math.min.apply(null, counts);
+                var range = Math.max.apply(null, counts) - min || 1;
+                return withTrace(figure, {
+                    locations: res.map(function (row) {
+                        return row.iso;
+                    }),
+                    marker: Object.assign({}, figure.data[0].marker, {
+                        size: counts.map(function (count) {
+                            return ((count - min) / range + 1) * 20;
+                        }),
+                    }),
+                    text: counts,
+                });
+            },
+
+            update_top_countries: function (selected, store, figure) {
+                var top = countsByCountry(store, selected)
+                    .sort(function (a, b) {
+                        return b.count - a.count;
+                    })
+                    .slice(0, 10)
+                    .reverse();
+                return withTrace(figure, {
+                    x: top.map(function (row) {
+                        return row.count;
+                    }),
+                    y: top.map(function (row) {
+                        return row.country;
+                    }),
+                });
+            },
+
+            update_export_links: function (selected, clickData, store) {
+                var boxClass = "text-white p-6 bg-[#111111] rounded-lg mt-2";
+                if (!selected.length) {
+                    return component("P", {
+                        children: "Seleccione al menos un periodo para descargar los datos.",
+                        className: boxClass,
+                    });
+                }
+
+                var pais = null;
+                if (clickData) {
+                    var j = store.iso.indexOf(clickData.points[0].location);
+                    pais = j >= 0 ? store.countries[j] : null;
+                }
+                var rows = [["Descargar selección: ", null]];
+                if (pais) {
+                    rows.push(["Descargar dinosaurios de " + pais + ": ", pais]);
+                }
+
+                return component("Div", {
+                    className: boxClass,
+                    children: rows.map(function (row) {
+                        var links = store.formats.map(function (fmt) {
+                            return component("A", {
+                                children: fmt.toUpperCase(),
+                                href: exportUrl(fmt, selected, row[1], store.dataset),
+                                className:
+                                    "inline-flex items-center p-2 rounded-lg bg-lime-300 text-gray-900 font-semibold me-2 hover:underline",
+                            });
+                        });
+                        return component("Div", {
+                            className: "flex flex-wrap items-center mb-2",
+                            children: [
+                                component("Span", { children: row[0], className: "font-semibold mr-2" }),
+                            ].concat(links),
+                        });
+                    }),
+                });
+            },
+        },
+    });
+})();
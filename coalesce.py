@@ -0,0 +1,230 @@
+"""Coalescencia de callbacks de Dash en el servidor.
+
+Una ráfaga de clicks (varios periodos seguidos en ``my-checklist``, o
+``all-or-none``) genera una request por click y por callback, y solo la
+última importa. ``init_app`` envuelve la vista ``_dash-update-component``
+con dos mecanismos:
+
+- El último gana: ninguna request espera a otra de su página. Si una llega
+  mientras otra de la misma página para el mismo output está en curso,
+  espera ``DINOSOURCE_COALESCE_WINDOW_MS`` por si llega una más nueva; las
+  que quedan viejas antes de calcular o mientras calculan responden 204 (lo
+  mismo que ``PreventUpdate``) y no pisan el resultado de la última.
+- Single-flight: requests idénticas (mismo cuerpo) que llegan a la vez,
+  de cualquier sesión, comparten un solo cálculo.
+
+La sesión se identifica con la cookie ``dinosource_sid``, que se asigna en
+la primera respuesta de la página o de un callback (no en la API ni en las
+exportaciones, que pueden pasar por caches compartidos). Como la cookie es
+del navegador y no de la pestaña, el renderer de Dash agrega además a cada
+request un id por carga de página (``renderer_hooks``); así una pestaña no
+descarta las requests de otra.
+
+El estado es por proceso, así que solo se coalescen las requests que
+atiende un mismo worker; con ``--threads 1`` estas ya llegan de a una y no
+hay nada que coalescer. Para esos casos está el debounce del lado del cliente
+(``DINOSOURCE_CHECKLIST_DEBOUNCE_MS`` en app.py).
+
+Está activado por defecto; ``DINOSOURCE_COALESCE=0`` lo desactiva. En las
+ráfagas medidas con ``loadtest.py --burst 6`` (32 sesiones, 4 hilos) el p99
+hasta que llega la última selección bajó de 556-573 ms a 397-480 ms.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import Response, request
+
+logger = logging.getLogger("dinosource.coalesce")
+
+enabled = os.environ.get("DINOSOURCE_COALESCE", "1") not in ("", "0", "false")
+
+# Espera antes de calcular, por si llega una request más nueva de la misma
+# página para el mismo output
+WINDOW_MS = int(os.environ.get("DINOSOURCE_COALESCE_WINDOW_MS", "30"))
+
+SESSION_COOKIE = "dinosource_sid"
+UPDATE_ENDPOINT = "/_dash-update-component"
+
+# Rutas de Dash que reciben la cookie: la página (índice y catch-all) y los
+# callbacks
+COOKIE_ENDPOINTS = ("/", "/<path:path>", UPDATE_ENDPOINT)
+
+# Campo con el id de la página que el renderer agrega a cada request
+PAGE_FIELD = "dinosource_page"
+REQUEST_PRE = (
+    "function (payload) {"
+    " window.dinosourcePage = window.dinosourcePage"
+    " || Date.now().toString(36) + Math.random().toString(36).slice(2);"
+    f" payload.{PAGE_FIELD} = window.dinosourcePage;"
+    " }"
+)
+
+
+def renderer_hooks():
+    # Para dash.Dash(hooks=...)
+    return {"request_pre": REQUEST_PRE} if enabled else None
+
+
+class _Slot:
+    def __init__(self):
+        self.generation = 0
+        self.users = 0
+
+
+class LatestWins:
+    """Descarta las llamadas con la misma clave que quedaron viejas.
+
+    Ninguna llamada espera a otra. Si llega mientras otra con la misma clave
+    está en curso espera ``window`` segundos por si llega una más nueva, y si
+    la reemplazan antes de empezar no calcula nada. Si la reemplazan
+    mientras calcula, el resultado se descarta."""
+
+    def __init__(self, window=0.0):
+        self.window = window
+        self.lock = threading.Lock()
+        self.slots = {}
+
+    def run(self, key, fn):
+        # Devuelve (True, resultado) o (False, None) si fue reemplazada
+        with self.lock:
+            slot = self.slots.setdefault(key, _Slot())
+            slot.generation += 1
+            slot.users += 1
+            generation = slot.generation
+            # Solo se espera si hay otra en curso: un click suelto no se demora
+            burst = slot.users > 1
+        try:
+            if burst and self.window:
+                time.sleep(self.window)
+            if slot.generation != generation:
+                return False, None
+            result = fn()
+            if slot.generation != generation:
+                return False, None
+            return True, result
+        finally:
+            with self.lock:
+                slot.users -= 1
+                if not slot.users:
+                    del self.slots[key]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Las llamadas concurrentes con la misma clave comparten un resultado."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def run(self, key, fn):
+        # Devuelve (resultado, compartido)
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result, False
+
+
+latest = LatestWins(WINDOW_MS / 1000)
+flights = SingleFlight()
+
+# Cantidad de requests por resultado: computed, shared, superseded
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(outcome, output):
+    with _stats_lock:
+        _stats[outcome] += 1
+    logger.debug("callback %s: %s", output, outcome)
+
+
+def init_app(server):
+    if not enabled:
+        return
+
+    view = server.view_functions[UPDATE_ENDPOINT]
+
+    def compute():
+        # Se guarda el contenido y no el Response para poder repetirlo
+        response = view()
+        return response.get_data(), response.status_code, dict(response.headers)
+
+    @functools.wraps(view)
+    def coalesced_view():
+        payload = request.get_json(silent=True) or {}
+        output = payload.get("output")
+        page = payload.get(PAGE_FIELD)
+
+        def shared():
+            # Sin el id de página, para compartir entre pestañas y sesiones
+            body = json.dumps(
+                {key: value for key, value in payload.items() if key != PAGE_FIELD},
+                sort_keys=True,
+            )
+            key = hashlib.sha1(body.encode()).hexdigest()
+            result, was_shared = flights.run(key, compute)
+            _count("shared" if was_shared else "computed", output)
+            return result
+
+        sid = request.cookies.get(SESSION_COOKIE)
+        if sid:
+            current, result = latest.run((sid, page, output), shared)
+            if not current:
+                _count("superseded", output)
+                return Response(status=204)
+        else:
+            result = shared()
+
+        data, status, headers = result
+        return Response(data, status=status, headers=headers)
+
+    server.view_functions[UPDATE_ENDPOINT] = coalesced_view
+
+    @server.after_request
+    def _set_session_cookie(response):
+        if (
+            request.endpoint in COOKIE_ENDPOINTS
+            and SESSION_COOKIE not in request.cookies
+        ):
+            response.set_cookie(
+                SESSION_COOKIE, uuid.uuid4().hex, httponly=True, samesite="Lax"
+            )
+        return response
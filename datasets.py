@@ -0,0 +1,407 @@
+"""Registro de conjuntos de datos y motores por dataset.
+
+Cada catálogo (dinosaurios, pterosaurios, reptiles marinos, ...) comparte el
+esquema del dataset original y se registra con ``register_dataset``. Otros
+catálogos se pueden agregar sin tocar el código con la variable de entorno
+``DINOSOURCE_DATASETS``::
+
+    DINOSOURCE_DATASETS='{"pterosaurios": {"label": "Pterosaurios",
+                          "source": "/data/pterosaurs.csv"}}'
+
+El ``Engine`` de un dataset (dataframe limpio, índices y agregados) se
+construye la primera vez que se pide y queda en un LRU con presupuesto de
+memoria (``DINOSOURCE_MEMORY_BUDGET_MB``). Al construirlo se guarda un
+snapshot del dataframe limpio en ``DINOSOURCE_SNAPSHOT_DIR``. La primera vez
+en cada proceso el snapshot se compara con la fuente; si el motor es
+desalojado, se reconstruye desde ese snapshot sin volver a descargar ni
+limpiar los datos.
+
+La limpieza está en ``etl``; ``EngineCache.refresh`` (``POST
+/api/v1/refresh``, ver ingest.py) procesa solo las filas agregadas al final
+de la fuente y las suma al snapshot. Cuando el snapshot cambia, sea por
+``refresh`` en otro proceso o por ``python etl.py``, ``EngineCache.get``
+reconstruye el motor desde el snapshot nuevo.
+
+Los registros que se ingieren con la API (ver ingest.py) se guardan en un
+log junto al snapshot. ``EngineCache.get`` aplica al motor lo que se haya
+agregado al log desde la última vez, actualizando los índices y agregados
+solo con las filas nuevas.
+"""
+
+import io
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import etl
+import geotime
+import memdiag
+from aggregates import Aggregates
+from taxonomy import TaxonomyTree
+
+logger = logging.getLogger("dinosource.datasets")
+
+DEFAULT_DATASET = "dinosaurios"
+TIMELINE_STEP_MA = 1
+
+# Registro: nombre -> {"label": ..., "source": ...}
+DATASETS = {}
+
+
+def register_dataset(name, label, source):
+    DATASETS[name] = {"label": label, "source": source}
+
+
+def register_from_env():
+    for name, spec in json.loads(os.environ.get("DINOSOURCE_DATASETS", "{}")).items():
+        register_dataset(name, spec.get("label", name), spec["source"])
+
+
+EMPTY_POSITIONS = np.empty(0, dtype=np.intp)
+
+
+class Engine:
+    """Dataframe limpio de un dataset y todas las estructuras derivadas."""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+        # Índices de posiciones por periodo y por país, para filtrar sin
+        # recorrer el dataframe completo
+        self.period_index = data.groupby("period").indices
+        self.country_index = data.groupby("lived_in").indices
+
+        # Agregados precalculados (conteos y órdenes), compartidos con la API
+        self.aggregates = Aggregates(data)
+
+        # Índice de intervalos de tiempo y cantidad de vivos por instante
+        self.time_index = geotime.TimeIndex(data["start_ma"], data["end_ma"])
+        self.timeline_counts = self.time_index.bucket_counts(TIMELINE_STEP_MA)
+
+        # Árbol taxonómico con cantidades y longitudes acumuladas por nodo
+        self.taxonomy = TaxonomyTree(data["taxonomy"], data["length"])
+
+        self.nbytes = sum(memdiag.deep_sizeof(obj) for _, _, obj in self.parts())
+
+        # Bytes del log de ingesta ya aplicados (ver catch_up). Reentrante: la
+        # ingesta lo toma para validar, escribir y aplicar sin intercalarse
+        self.log_offset = 0
+        self.lock = threading.RLock()
+
+        # Versión del snapshot del que se construyó (ver EngineCache.get)
+        self.snapshot_stamp = None
+
+        # Columnas con espacio libre para append (se crean en el primero)
+        self.columns = None
+
+    def parts(self):
+        # Estructuras que se reportan en el diagnóstico de memoria
+        return [
+            ("data", "dataset", self.data),
+            ("period_index", "index", self.period_index),
+            ("country_index", "index", self.country_index),
+            ("aggregates", "cache", self.aggregates.period_counts),
+            ("time_index", "index", self.time_index),
+            ("timeline_counts", "cache", self.timeline_counts),
+            ("taxonomy", "index", self.taxonomy),
+        ]
+
+    def part(self, name):
+        return next(obj for part, _, obj in self.parts() if part == name)
+
+    def append(self, rows):
+        # Agrega filas ya limpias al final y actualiza cada estructura solo
+        # con ellas. Las posiciones anteriores no cambian, así que un hilo que
+        # lee a la vez sigue viendo datos válidos
+        start = len(self.data)
+        positions = np.arange(start, start + len(rows))
+        rows = rows.reindex(columns=self.data.columns).set_axis(
+            pd.RangeIndex(start, start + len(rows))
+        )
+        if self.columns is None:
+            self.columns = _ColumnBuffers(self.data)
+        self.columns.extend(rows)
+        data = self.columns.frame()
+
+        self.period_index = _extend_index(self.period_index, rows["period"], positions)
+        self.country_index = _extend_index(
+            self.country_index, rows["lived_in"], positions
+        )
+        self.aggregates.append(data, rows)
+        self.time_index.append(rows["start_ma"], rows["end_ma"], positions)
+        self.timeline_counts = self.time_index.bucket_counts(TIMELINE_STEP_MA)
+        self.taxonomy.append(rows["taxonomy"], rows["length"])
+        self.data = data
+        self.nbytes += memdiag.deep_sizeof(rows)
+
+    def catch_up(self):
+        # Aplica los registros ingeridos (por este u otro proceso) desde la
+        # última lectura del log
+        try:
+            size = os.path.getsize(ingest_log_path(self.name))
+        except OSError:
+            return 0
+        if size <= self.log_offset:
+            return 0
+
+        with self.lock:
+            records, offset = read_ingest_log(self.name, self.log_offset)
+            if records:
+                rows, _ = etl.run(records_to_frame(records))
+                self.append(rows)
+                logger.info("Motor %s: %d filas ingeridas", self.name, len(rows))
+            self.log_offset = offset
+        return len(records)
+
+    # Obtener las posiciones de las filas de los periodos (y país) seleccionados
+    def select_positions(self, periodo, pais=None):
+        if periodo == "Todos":
+            positions = np.arange(len(self.data))
+        else:
+            positions = np.sort(
+                np.concatenate(
+                    [self.period_index.get(p, EMPTY_POSITIONS) for p in periodo]
+                    + [EMPTY_POSITIONS]
+                )
+            )
+        if pais:
+            positions = np.intersect1d(
+                positions,
+                self.country_index.get(pais, EMPTY_POSITIONS),
+                assume_unique=True,
+            )
+        return positions
+
+
+class _ColumnBuffers:
+    """Columnas del dataframe en arreglos con espacio libre al final.
+
+    ``append`` escribe las filas nuevas después de las existentes y arma un
+    dataframe que apunta a los mismos arreglos, sin copiar las filas
+    anteriores; solo se copian al duplicar la capacidad. Los dataframes
+    anteriores siguen viendo sus filas: nunca se escribe sobre ellas.
+    """
+
+    def __init__(self, data):
+        self.length = len(data)
+        self.arrays = {}
+        for column, values in data.items():
+            dtype = values.dtype if values.dtype.kind == "f" else object
+            array = np.empty(max(2 * self.length, 64), dtype=dtype)
+            array[: self.length] = values.to_numpy(dtype=dtype)
+            self.arrays[column] = array
+
+    def extend(self, rows):
+        end = self.length + len(rows)
+        for column, array in self.arrays.items():
+            if end > len(array):
+                grown = np.empty(max(2 * len(array), end), dtype=array.dtype)
+                grown[: self.length] = array[: self.length]
+                self.arrays[column] = array = grown
+            array[self.length : end] = rows[column].to_numpy(dtype=array.dtype)
+        self.length = end
+
+    def frame(self):
+        return pd.DataFrame(
+            {
+                column: pd.Series(array[: self.length], dtype=array.dtype, copy=False)
+                for column, array in self.arrays.items()
+            },
+            copy=False,
+        )
+
+
+def _extend_index(index, keys, positions):
+    # Copia del índice con las posiciones nuevas agregadas por clave
+    index = dict(index)
+    for key, offsets in keys.groupby(keys).indices.items():
+        index[key] = np.concatenate(
+            [index.get(key, EMPTY_POSITIONS), positions[offsets]]
+        )
+    return index
+
+
+def snapshot_dir():
+    return os.environ.get("DINOSOURCE_SNAPSHOT_DIR", ".snapshots")
+
+
+def snapshot_path(name):
+    return os.path.join(snapshot_dir(), f"{name}.pkl")
+
+
+def snapshot_stamp(name):
+    # Cambia cada vez que se reescribe el snapshot (el .json se escribe último)
+    try:
+        stat = os.stat(f"{snapshot_path(name)}.json")
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Log de ingesta: registros crudos agregados con la API, uno por línea. Se
+# aplica sobre el snapshot al construir el motor y cada proceso lo sigue
+# leyendo para tomar lo que ingieren los demás
+def ingest_log_path(name):
+    return os.path.join(snapshot_dir(), f"{name}.ingest.jsonl")
+
+
+def append_ingest_log(name, records):
+    path = ingest_log_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = "".join(
+        json.dumps(record, ensure_ascii=False) + "\n" for record in records
+    ).encode()
+    # Una sola escritura con O_APPEND, para que las líneas de varios
+    # procesos no se mezclen
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, payload)
+    finally:
+        os.close(fd)
+
+
+def read_ingest_log(name, offset):
+    # Registros completos desde `offset`; devuelve (registros, nuevo offset)
+    try:
+        with open(ingest_log_path(name), "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return [], offset
+    end = chunk.rfind(b"\n") + 1
+    records = [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+    return records, offset + end
+
+
+def records_to_frame(records):
+    # Se leen como la fuente (todo como texto) para limpiarlos igual
+    frame = pd.DataFrame.from_records(records, columns=etl.RAW_COLUMNS)
+    return etl.read_source(io.StringIO(frame.to_csv(index=False)))
+
+
+def load_clean_data(name, check_source=True):
+    # Con check_source se compara el snapshot con la fuente (update_snapshot
+    # suma las filas nuevas o reprocesa todo si cambió); sin él se confía en
+    # el snapshot, como al reconstruir un motor desalojado. Si el snapshot
+    # falta o no se puede leer se limpia la fuente completa
+    path = snapshot_path(name)
+    if not check_source and os.path.exists(path):
+        data = etl.read_snapshot(path)
+        if data is not None:
+            return data
+
+    try:
+        data, _ = etl.update_snapshot(DATASETS[name]["source"], path)
+    except OSError as e:
+        logger.warning("No se pudo guardar el snapshot de %s: %s", name, e)
+        data, _ = etl.run(etl.read_source(DATASETS[name]["source"]))
+    return data
+
+
+def refresh_clean_data(name):
+    # Limpia solo las filas agregadas a la fuente desde el último snapshot
+    data, report = etl.update_snapshot(DATASETS[name]["source"], snapshot_path(name))
+    return data, report
+
+
+class EngineCache:
+    """LRU de motores con presupuesto de memoria en bytes."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.engines = OrderedDict()
+        self.lock = threading.Lock()
+        self.build_locks = {}
+        # Datasets cuyo snapshot ya se comparó con la fuente en este proceso
+        self.checked = set()
+
+    def total_bytes(self):
+        return sum(engine.nbytes for engine in self.engines.values())
+
+    def get(self, name):
+        engine = self._get(name)
+        if engine.snapshot_stamp != snapshot_stamp(name):
+            # Otro proceso (o el CLI de etl) actualizó el snapshot
+            self._drop(name, engine)
+            engine = self._get(name)
+        engine.catch_up()
+        return engine
+
+    def _get(self, name):
+        if name not in DATASETS:
+            raise KeyError(name)
+
+        with self.lock:
+            if name in self.engines:
+                self.engines.move_to_end(name)
+                return self.engines[name]
+            build_lock = self.build_locks.setdefault(name, threading.Lock())
+
+        # Un solo hilo construye cada motor; el resto espera y lo reutiliza
+        with build_lock:
+            with self.lock:
+                if name in self.engines:
+                    self.engines.move_to_end(name)
+                    return self.engines[name]
+
+            data = load_clean_data(name, check_source=name not in self.checked)
+            self.checked.add(name)
+            engine = Engine(name, data)
+            engine.snapshot_stamp = snapshot_stamp(name)
+            logger.info("Motor %s construido (%d bytes)", name, engine.nbytes)
+
+            with self.lock:
+                self.engines[name] = engine
+                self._register(engine)
+                self._evict(keep=name)
+            return engine
+
+    def refresh(self, name):
+        # Actualiza el snapshot con las filas nuevas de la fuente y descarta
+        # el motor en memoria; el próximo get lo reconstruye
+        if name not in DATASETS:
+            raise KeyError(name)
+        _, report = refresh_clean_data(name)
+        if report:
+            self._drop(name)
+        return report
+
+    def _drop(self, name, engine=None):
+        # Saca el motor (o solo ese motor, si otro hilo ya lo reemplazó)
+        with self.lock:
+            current = self.engines.get(name)
+            if current is not None and engine in (None, current):
+                del self.engines[name]
+                self._unregister(current)
+
+    def _evict(self, keep):
+        while self.total_bytes() > self.budget_bytes and len(self.engines) > 1:
+            name = next(iter(self.engines))
+            if name == keep:
+                break
+            engine = self.engines.pop(name)
+            self._unregister(engine)
+            logger.info("Motor %s desalojado (%d bytes)", name, engine.nbytes)
+
+    def _register(self, engine):
+        # Se resuelve en cada lectura: append reemplaza las estructuras
+        for part, kind, _ in engine.parts():
+            memdiag.register(
+                f"{engine.name}.{part}",
+                lambda engine=engine, part=part: engine.part(part),
+                kind=kind,
+            )
+
+    def _unregister(self, engine):
+        for part, _, _ in engine.parts():
+            memdiag.unregister(f"{engine.name}.{part}")
+
+
+def memory_budget_bytes():
+    return int(float(os.environ.get("DINOSOURCE_MEMORY_BUDGET_MB", "512")) * 2**20)
@@ -0,0 +1,262 @@
+"""Limpieza del dataset como pipeline declarativo.
+
+Cada paso (``Step``) es una transformación vectorizada sobre el dataframe
+crudo, con una validación opcional. ``run`` ejecuta los pasos en orden, mide
+el tiempo de cada uno y devuelve el dataframe limpio junto con el reporte.
+
+Las correcciones de valores puntuales viven en la tabla ``CORRECTIONS``
+(columna -> valor original -> valor corregido), no en el código de los
+pasos.
+
+``update_snapshot`` mantiene un snapshot limpio (pickle) junto a un archivo
+``.json`` con la cantidad de bytes crudos procesados y su hash. En modo
+incremental, si esos bytes siguen siendo el comienzo de la fuente, solo se
+limpian las filas agregadas al final desde la última corrida y se
+concatenan al snapshot existente; si cambió cualquier parte ya procesada,
+se reprocesa todo.
+
+Uso:
+
+    python etl.py FUENTE.csv .snapshots/dinosaurios.pkl [--full]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+import urllib.request
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import pandas as pd
+
+import geotime
+
+logger = logging.getLogger("dinosource.etl")
+
+REQUIRED_COLUMNS = ["name", "diet", "period", "lived_in", "type", "length"]
+
+# Columnas de la fuente cruda
+RAW_COLUMNS = REQUIRED_COLUMNS + ["taxonomy", "named_by", "species", "link"]
+
+# Correcciones de valores: columna -> {valor original: valor corregido}
+CORRECTIONS = {
+    "period": {"USA": "Late Cretaceous"},
+    "lived_in": {"North Africa": "Algeria", "Wales": "United Kingdom"},
+}
+
+
+class EtlError(ValueError):
+    pass
+
+
+@dataclass
+class Step:
+    name: str
+    transform: Callable[[pd.DataFrame], pd.DataFrame]
+    validate: Optional[Callable[[pd.DataFrame], Optional[str]]] = None
+
+
+# Pasos
+
+
+def check_columns(data):
+    missing = [c for c in REQUIRED_COLUMNS if c not in data.columns]
+    return f"Faltan columnas: {', '.join(missing)}" if missing else None
+
+
+def parse_length(data):
+    # Quitar el caracter m
+    data["length"] = pd.to_numeric(
+        data["length"].str.replace("m", "", regex=False), errors="coerce"
+    )
+    return data
+
+
+def check_length(data):
+    negative = int((data["length"] < 0).sum())
+    return f"{negative} longitudes negativas" if negative else None
+
+
+def capitalize_names(data):
+    data["name"] = data["name"].str.capitalize()
+    return data
+
+
+def check_names(data):
+    missing = int(data["name"].isna().sum())
+    return f"{missing} filas sin nombre" if missing else None
+
+
+def apply_corrections(data):
+    for column, mapping in CORRECTIONS.items():
+        data[column] = data[column].replace(mapping)
+    return data
+
+
+def split_period(data):
+    # Separar el nombre del periodo y los límites en millones de años
+    data["full_period"] = data["period"]
+    data[["period", "start_ma", "end_ma"]] = geotime.parse_full_period(
+        data["full_period"]
+    )
+    return data
+
+
+def check_corrections(data):
+    # Variantes que la tabla no corrige por mayúsculas o espacios ("usa",
+    # "Wales "): quedarían como un periodo o país aparte
+    pending = []
+    for column, mapping in CORRECTIONS.items():
+        keys = {key.strip().casefold() for key in mapping}
+        values = data[column].dropna()
+        pending += values[values.str.strip().str.casefold().isin(keys)].tolist()
+    return f"Valores sin corregir: {sorted(set(pending))}" if pending else None
+
+
+def check_period(data):
+    # Sin rango numérico ni periodo conocido (geotime.PERIOD_SPANS) la fila
+    # no tendría lugar en la línea de tiempo
+    unknown = data["start_ma"].isna() | data["end_ma"].isna()
+    if not unknown.any():
+        return None
+    return f"Periodo no reconocido en {data['full_period'][unknown].tolist()[:10]}"
+
+
+STEPS = [
+    Step("columns", lambda data: data, check_columns),
+    Step("length", parse_length, check_length),
+    Step("names", capitalize_names, check_names),
+    Step("corrections", apply_corrections, check_corrections),
+    Step("period", split_period, check_period),
+]
+
+
+def run(data, steps=STEPS):
+    report = []
+    for step in steps:
+        start = time.perf_counter()
+        data = step.transform(data)
+        error = step.validate(data) if step.validate else None
+        elapsed = time.perf_counter() - start
+        report.append({"step": step.name, "seconds": elapsed, "rows": len(data)})
+        logger.info("Paso %s: %d filas en %.4fs", step.name, len(data), elapsed)
+        if error:
+            raise EtlError(f"Paso {step.name}: {error}")
+    return data, report
+
+
+def read_source(source, skiprows=None):
+    # Todo como texto, para que la parte nueva y la fuente completa se lean
+    # igual aunque una columna venga vacía en las filas agregadas
+    return pd.read_csv(source, dtype=str, skiprows=skiprows)
+
+
+def read_source_bytes(source):
+    # Contenido crudo de la fuente (ruta o URL), para comparar con el snapshot
+    if urlparse(str(source)).scheme in ("http", "https", "ftp", "file"):
+        with urllib.request.urlopen(source) as response:
+            return response.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def _sha1(content):
+    return hashlib.sha1(content).hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if {"raw_bytes", "raw_sha1"} <= set(meta) else None
+
+
+def _appended(content, meta):
+    # Bytes agregados al final de la fuente desde la última corrida, o None
+    # si cambió algo de lo ya procesado
+    seen = meta["raw_bytes"]
+    if len(content) < seen or _sha1(content[:seen]) != meta["raw_sha1"]:
+        return None
+    new = content[seen:]
+    # Si la última fila no terminaba en salto de línea, lo nuevo tiene que
+    # empezar con uno; si no, se le agregó texto a esa fila
+    if not content[:seen].endswith(b"\n") and new[:1] not in (b"", b"\r", b"\n"):
+        return None
+    return new
+
+
+def _meta(content, raw_rows):
+    return {"raw_rows": raw_rows, "raw_bytes": len(content), "raw_sha1": _sha1(content)}
+
+
+def _write_snapshot(data, path, meta):
+    # Archivo temporal + rename, para que otro proceso nunca lea un snapshot
+    # a medio escribir
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data.to_pickle(f"{path}.tmp", compression=None)
+    os.replace(f"{path}.tmp", path)
+    with open(f"{path}.json.tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(f"{path}.json.tmp", f"{path}.json")
+
+
+def read_snapshot(path):
+    # None si no se puede leer (corrupto, o de otra versión de pandas)
+    try:
+        return pd.read_pickle(path, compression=None)
+    except Exception as e:
+        logger.warning("No se pudo leer el snapshot %s: %s", path, e)
+        return None
+
+
+def update_snapshot(source, path, full=False):
+    # Devuelve el dataframe limpio actualizado y el reporte de la corrida
+    content = read_source_bytes(source)
+    meta = None if full or not os.path.exists(path) else _read_meta(f"{path}.json")
+    new = _appended(content, meta) if meta else None
+    snapshot = read_snapshot(path) if new is not None else None
+
+    if snapshot is not None:
+        if not new.strip():
+            return snapshot, []
+
+        # Encabezado + bytes nuevos: se leen como la fuente completa
+        header = content[: content.index(b"\n") + 1]
+        new_rows = read_source(io.BytesIO(header + new))
+        clean, report = run(new_rows)
+        data = pd.concat([snapshot, clean], ignore_index=True)
+        _write_snapshot(data, path, _meta(content, meta["raw_rows"] + len(new_rows)))
+        logger.info("Snapshot %s: %d filas nuevas", path, len(new_rows))
+        return data, report
+
+    if meta:
+        logger.warning("La fuente de %s cambió o el snapshot no se puede leer", path)
+    raw = read_source(io.BytesIO(content))
+    data, report = run(raw.copy())
+    _write_snapshot(data, path, _meta(content, len(raw)))
+    return data, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Limpieza del dataset de dinosource")
+    parser.add_argument("source", help="CSV crudo (ruta o URL)")
+    parser.add_argument("snapshot", help="Snapshot limpio (.pkl)")
+    parser.add_argument("--full", action="store_true", help="Reprocesar todo")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    data, report = update_snapshot(args.source, args.snapshot, full=args.full)
+    for row in report:
+        print(f"{row['step']:<12}{row['rows']:>10} filas{row['seconds']:>10.4f}s")
+    print(f"Snapshot con {len(data)} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Exportación en streaming de los datos filtrados.
+
+``GET /export/<formato>?periodo=...&periodo=...&pais=...`` devuelve las filas
+seleccionadas en CSV, JSON Lines o Parquet. La salida se genera por bloques
+de ``EXPORT_CHUNK_ROWS`` filas a partir de las posiciones del índice
+filtrado, sin armar nunca el archivo completo en memoria.
+
+Parquet requiere ``pyarrow``; si no está instalado el formato no se ofrece.
+"""
+
+import io
+import re
+import unicodedata
+from urllib.parse import quote, urlencode
+
+from flask import Response, abort, request, stream_with_context
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = None
+    pq = None
+
+EXPORT_CHUNK_ROWS = 5000
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson; charset=utf-8", "jsonl"),
+}
+if pa is not None:
+    FORMATS["parquet"] = ("application/vnd.apache.parquet", "parquet")
+
+
+def iter_chunks(frame, positions, chunk_size=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(positions), chunk_size):
+        yield frame.take(positions[start : start + chunk_size])
+
+
+def iter_csv(frame, positions):
+    yield frame.iloc[:0].to_csv(index=False)
+    for chunk in iter_chunks(frame, positions):
+        yield chunk.to_csv(index=False, header=False)
+
+
+def iter_jsonl(frame, positions):
+    for chunk in iter_chunks(frame, positions):
+        lines = chunk.to_json(orient="records", lines=True, force_ascii=False)
+        # pandas >= 1.5 ya termina cada bloque con salto de línea; una línea
+        # vacía rompe a los lectores de JSON Lines
+        yield lines if lines.endswith("\n") or not lines else lines + "\n"
+
+
+class _Drain(io.RawIOBase):
+    # Sink para ParquetWriter: acumula lo escrito hasta que se drena
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.parts.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        out = b"".join(self.parts)
+        self.parts = []
+        return out
+
+
+def iter_parquet(frame, positions):
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    sink = _Drain()
+    with pq.ParquetWriter(sink, schema) as writer:
+        # Cada bloque se escribe como un row group y se envía en el acto
+        for chunk in iter_chunks(frame, positions):
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = {"csv": iter_csv, "jsonl": iter_jsonl, "parquet": iter_parquet}
+
+
+def export_url(fmt, periodos=None, pais=None, dataset=None):
+    # periodos=None exporta todos los periodos
+    params = [("periodo", p) for p in periodos or []]
+    if pais:
+        params.append(("pais", pais))
+    if dataset:
+        params.append(("dataset", dataset))
+    query = urlencode(params)
+    return f"/export/{fmt}" + (f"?{query}" if query else "")
+
+
+def content_disposition(filename):
+    # Los headers van en latin-1: ``filename`` lleva una versión ASCII sin
+    # comillas y ``filename*`` (RFC 5987) el nombre completo en UTF-8
+    ascii_name = (
+        unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode()
+    )
+    ascii_name = re.sub(r"[^A-Za-z0-9._-]+", "_", ascii_name)
+    return (
+        f'attachment; filename="{ascii_name}"; '
+        f"filename*=UTF-8''{quote(filename, safe='')}"
+    )
+
+
+def init_app(server, get_engine):
+    # get_engine(dataset) devuelve el motor con el dataframe a exportar y las
+    # posiciones de las filas filtradas (Engine.select_positions)
+    @server.route("/export/<fmt>")
+    def export_rows(fmt):
+        if fmt not in FORMATS:
+            abort(404)
+        periodos = request.args.getlist("periodo") or "Todos"
+        pais = request.args.get("pais")
+        try:
+            engine = get_engine(request.args.get("dataset"))
+        except KeyError:
+            abort(404)
+
+        frame = engine.data
+        positions = engine.select_positions(periodos, pais)
+        mimetype, extension = FORMATS[fmt]
+        filename = f"{engine.name}-{pais}" if pais else engine.name
+
+        return Response(
+            stream_with_context(WRITERS[fmt](frame, positions)),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": content_disposition(f"{filename}.{extension}")
+            },
+        )
@@ -0,0 +1,168 @@
+"""Modelo de tiempo geológico.
+
+``parse_full_period`` convierte textos como "Late Cretaceous 83-70 million
+years ago" en el nombre del periodo y los límites numéricos ``start_ma`` /
+``end_ma`` (millones de años atrás, ``start_ma >= end_ma``). Si el texto no
+trae números se usan los límites del periodo según la escala de la ICS.
+
+``TimeIndex`` guarda los extremos ordenados de los intervalos y responde
+"¿cuántos vivían hace T millones de años?" y "¿cuántos se solapan con
+[a, b]?" con búsquedas binarias. Para listar los que se solapan se recorren
+solo los candidatos cuyo inicio está entre ``a`` y ``b`` más la duración del
+intervalo más largo: el costo depende de cuántos caen en esa ventana, no del
+total.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Límites de los periodos (millones de años atrás), escala ICS
+PERIOD_SPANS = {
+    "Early Triassic": (251.9, 247.2),
+    "Mid Triassic": (247.2, 237.0),
+    "Middle Triassic": (247.2, 237.0),
+    "Late Triassic": (237.0, 201.4),
+    "Early Jurassic": (201.4, 174.7),
+    "Mid Jurassic": (174.7, 161.5),
+    "Middle Jurassic": (174.7, 161.5),
+    "Late Jurassic": (161.5, 145.0),
+    "Early Cretaceous": (145.0, 100.5),
+    "Mid Cretaceous": (113.0, 89.8),
+    "Late Cretaceous": (100.5, 66.0),
+}
+
+PERIOD_PATTERN = (
+    r"^(?P<period>[^\d]*)"
+    r"(?:(?P<start>\d+(?:\.\d+)?)\s*(?:-\s*(?P<end>\d+(?:\.\d+)?))?\s*million)?"
+)
+
+
+def parse_full_period(full_period):
+    parts = full_period.str.extract(PERIOD_PATTERN)
+    period = parts["period"].str.strip(" ,")
+    # Sin nombre reconocible se conserva el texto original
+    period = period.where(period.str.len() > 0, full_period)
+
+    start = parts["start"].astype(float)
+    end = parts["end"].astype(float).fillna(start)
+    spans = pd.DataFrame.from_dict(
+        PERIOD_SPANS, orient="index", columns=["start", "end"]
+    )
+    start = start.fillna(period.map(spans["start"]))
+    end = end.fillna(period.map(spans["end"]))
+
+    # Algunos rangos vienen invertidos ("70-83")
+    return pd.DataFrame(
+        {
+            "period": period,
+            "start_ma": np.fmax(start, end),
+            "end_ma": np.fmin(start, end),
+        },
+        index=full_period.index,
+    )
+
+
+class TimeIndex:
+    def __init__(self, start_ma, end_ma):
+        start = np.asarray(start_ma, dtype=float)
+        end = np.asarray(end_ma, dtype=float)
+        valid = ~(np.isnan(start) | np.isnan(end))
+
+        self.positions = np.flatnonzero(valid)
+        self.start = start[valid]
+        self.end = end[valid]
+        self.sorted_start = np.sort(self.start)
+        self.sorted_end = np.sort(self.end)
+
+        # Posiciones ordenadas por inicio, para listar candidatos
+        order = np.argsort(self.start, kind="stable")
+        self.by_start = order
+        self.by_start_values = self.start[order]
+
+        # Duración del intervalo más largo: acota por arriba el inicio de los
+        # que pueden terminar antes de un instante dado
+        self.max_duration = float((self.start - self.end).max()) if len(order) else 0.0
+
+    def __len__(self):
+        return len(self.start)
+
+    def append(self, start_ma, end_ma, positions):
+        # Inserta intervalos nuevos en los arreglos ordenados sin reordenar
+        start = np.asarray(start_ma, dtype=float)
+        end = np.asarray(end_ma, dtype=float)
+        valid = ~(np.isnan(start) | np.isnan(end))
+        start, end = start[valid], end[valid]
+        if not len(start):
+            return
+
+        # Índices de los nuevos dentro de self.start, en orden estable
+        new = len(self.start) + np.argsort(start, kind="stable")
+        new_values = np.sort(start, kind="stable")
+
+        # Primero crecen los arreglos a los que apuntan los índices, así un
+        # hilo que lee a la vez nunca ve un índice fuera de rango
+        self.start = np.concatenate([self.start, start])
+        self.end = np.concatenate([self.end, end])
+        self.positions = np.concatenate([self.positions, np.asarray(positions)[valid]])
+        # Solo puede crecer: ensanchar la ventana antes de insertar nunca
+        # deja afuera un intervalo
+        self.max_duration = max(self.max_duration, float((start - end).max()))
+
+        at = np.searchsorted(self.by_start_values, new_values, side="right")
+        self.by_start = np.insert(self.by_start, at, new)
+        self.by_start_values = np.insert(self.by_start_values, at, new_values)
+        self.sorted_start = np.insert(
+            self.sorted_start,
+            np.searchsorted(self.sorted_start, new_values),
+            new_values,
+        )
+        end_values = np.sort(end)
+        self.sorted_end = np.insert(
+            self.sorted_end, np.searchsorted(self.sorted_end, end_values), end_values
+        )
+
+    def count_alive(self, t):
+        # end <= t <= start  ==  #(start >= t) - #(end > t)
+        t = np.asarray(t, dtype=float)
+        n_start_ge = len(self.sorted_start) - np.searchsorted(
+            self.sorted_start, t, side="left"
+        )
+        n_end_gt = len(self.sorted_end) - np.searchsorted(
+            self.sorted_end, t, side="right"
+        )
+        return n_start_ge - n_end_gt
+
+    def count_overlapping(self, a, b):
+        # [end, start] se solapa con [a, b] si end <= b y start >= a
+        a, b = min(a, b), max(a, b)
+        n_end_gt = len(self.sorted_end) - np.searchsorted(
+            self.sorted_end, b, side="right"
+        )
+        n_start_lt = np.searchsorted(self.sorted_start, a, side="left")
+        return len(self) - n_end_gt - n_start_lt
+
+    def overlapping(self, a, b):
+        # Posiciones (en el dataframe) de los intervalos que se solapan con
+        # [a, b]. Como end >= start - max_duration, los que terminan antes de
+        # b empiezan antes de b + max_duration
+        a, b = min(a, b), max(a, b)
+        first = np.searchsorted(self.by_start_values, a, side="left")
+        last = np.searchsorted(
+            self.by_start_values, b + self.max_duration, side="right"
+        )
+        candidates = self.by_start[first:last]
+        hits = candidates[self.end[candidates] <= b]
+        return np.sort(self.positions[hits])
+
+    def alive(self, t):
+        return self.overlapping(t, t)
+
+    def bucket_counts(self, step=1.0):
+        # Cantidad de vivos en cada instante de la grilla, de lo más antiguo a
+        # lo más reciente
+        if not len(self):
+            return pd.Series(dtype=int)
+        lo = np.floor(self.end.min() / step) * step
+        hi = np.ceil(self.start.max() / step) * step
+        points = np.arange(hi, lo - step / 2, -step)
+        return pd.Series(self.count_alive(points), index=points, name="count")
@@ -0,0 +1,162 @@
+"""Ingesta de registros nuevos.
+
+- ``POST /api/v1/dinosaurs?dataset=<nombre>`` con un registro o una lista de
+  registros JSON con las columnas de la fuente cruda (``name``, ``diet``,
+  ``period``, ``lived_in``, ``type``, ``length``, y opcionalmente
+  ``taxonomy``, ``named_by``, ``species``, ``link``).
+
+- ``POST /api/v1/refresh?dataset=<nombre>`` vuelve a leer la fuente del
+  dataset y limpia solo las filas que se le agregaron al final
+  (``EngineCache.refresh``).
+
+Ambas requieren ``Authorization: Bearer <token>`` con el valor de
+``DINOSOURCE_INGEST_TOKEN``; sin esa variable están desactivadas.
+
+Los registros se limpian con el mismo pipeline que la fuente (``etl``) y, si
+pasan las validaciones, se agregan al log de ingesta del dataset
+(``datasets.append_ingest_log``). Cada proceso aplica las filas nuevas a su
+motor con ``Engine.catch_up`` y actualiza índices y agregados solo con esas
+filas, así el dashboard y la API las ven en la siguiente request.
+"""
+
+import hmac
+import math
+import os
+
+from flask import Blueprint, request
+
+import datasets
+import etl
+from api import error, json_response
+
+INGEST_MAX_RECORDS = 1000
+
+ingest = Blueprint("ingest", __name__, url_prefix="/api/v1")
+
+# Funciones que devuelven el motor de un dataset y actualizan su snapshot
+# desde la fuente, se definen en init_app
+_get_engine = None
+_refresh = None
+
+
+def _check_token():
+    token = os.environ.get("DINOSOURCE_INGEST_TOKEN")
+    if not token:
+        error(403, "La ingesta no está habilitada")
+    scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+    if scheme != "Bearer" or not hmac.compare_digest(given.encode(), token.encode()):
+        error(401, "Token inválido")
+
+
+def _is_scalar(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, (str, int))
+
+
+def _records():
+    body = request.get_json(silent=True)
+    records = [body] if isinstance(body, dict) else body
+    if not isinstance(records, list) or not records:
+        error(400, "Se espera un registro o una lista de registros")
+    if len(records) > INGEST_MAX_RECORDS:
+        error(400, f"Máximo {INGEST_MAX_RECORDS} registros por request")
+
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            error(400, f"Registro {i}: se espera un objeto")
+        unknown = set(record) - set(etl.RAW_COLUMNS)
+        if unknown:
+            error(400, f"Registro {i}: columnas desconocidas {sorted(unknown)}")
+        # Solo texto y números: una lista o un objeto se guardaría en el log y
+        # terminaría como texto en cada reconstrucción
+        invalid = [
+            column
+            for column, value in record.items()
+            if value is not None and not _is_scalar(value)
+        ]
+        if invalid:
+            error(400, f"Registro {i}: valores inválidos en {', '.join(invalid)}")
+        missing = [c for c in etl.REQUIRED_COLUMNS if record.get(c) in (None, "")]
+        if missing:
+            error(400, f"Registro {i}: faltan {', '.join(missing)}")
+    return records
+
+
+def _validate(engine, records):
+    # Misma limpieza que la fuente; solo se guardan registros que la pasan
+    raw = datasets.records_to_frame(records)
+    try:
+        rows, _ = etl.run(raw.copy())
+    except etl.EtlError as e:
+        error(400, str(e))
+
+    bad_length = rows["length"].isna() & raw["length"].notna()
+    if bad_length.any():
+        error(400, f"Longitud inválida en {raw['length'][bad_length].tolist()}")
+
+    names = rows["name"].str.lower()
+    repeated = names[names.duplicated()].tolist() + [
+        name for name in names if name in engine.aggregates.by_name
+    ]
+    if repeated:
+        error(409, f"Ya existen: {', '.join(sorted(set(repeated)))}")
+
+
+@ingest.route("/dinosaurs", methods=["POST"])
+def add_dinosaurs():
+    _check_token()
+    name = request.args.get("dataset") or datasets.DEFAULT_DATASET
+    try:
+        engine = _get_engine(name)
+    except KeyError:
+        error(404, f"No existe el dataset '{name}'")
+
+    records = _records()
+    with engine.lock:
+        engine.catch_up()
+        _validate(engine, records)
+        datasets.append_ingest_log(name, records)
+        engine.catch_up()
+
+    return json_response(
+        {
+            "dataset": name,
+            "added": len(records),
+            "total": len(engine.data),
+            "version": engine.aggregates.version,
+        },
+        201,
+    )
+
+
+@ingest.route("/refresh", methods=["POST"])
+def refresh():
+    _check_token()
+    name = request.args.get("dataset") or datasets.DEFAULT_DATASET
+    try:
+        report = _refresh(name)
+        engine = _get_engine(name)
+    except KeyError:
+        error(404, f"No existe el dataset '{name}'")
+    except etl.EtlError as e:
+        error(422, str(e))
+
+    return json_response(
+        {
+            "dataset": name,
+            # Filas limpiadas: las nuevas, o todas si la fuente cambió
+            "processed": report[0]["rows"] if report else 0,
+            "total": len(engine.data),
+            "version": engine.aggregates.version,
+        }
+    )
+
+
+def init_app(server, get_engine, refresh):
+    global _get_engine, _refresh
+    _get_engine = get_engine
+    _refresh = refresh
+    server.register_blueprint(ingest)
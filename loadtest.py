@@ -0,0 +1,732 @@
+"""Generador de carga para dinosource.
+
+Reproduce sesiones realistas de usuario contra ``app.server`` enviando los
+mismos payloads de ``_dash-update-component`` que envía el navegador: carga
+inicial, cambio entre páginas, selección de periodos en ``my-checklist`` y
+``all-or-none``, el botón ``btn-asc-desc``, el arrastre de los sliders de la
+línea de tiempo y la navegación por el árbol taxonómico.
+
+Uso:
+
+    # En proceso, con el test client de Flask (curva por cantidad de hilos)
+    python loadtest.py --sessions 50 --threads 1,2,4,8
+
+    # Contra gunicorn levantado por el harness (curva workers x threads)
+    python loadtest.py --gunicorn --workers 1,2,4 --threads 1,4 --concurrency 8
+
+    # Contra un servidor ya levantado
+    python loadtest.py --url http://127.0.0.1:8050 --concurrency 8
+
+    # Ráfagas de 6 clicks en los periodos (con DINOSOURCE_PERIODO_CLIENTSIDE=0,
+    # y DINOSOURCE_COALESCE=0 para comparar sin la coalescencia; la fila
+    # "burst" es el tiempo hasta que llega la última selección)
+    python loadtest.py --gunicorn --workers 2 --threads 4 --burst 6
+
+Si la app consulta la versión de los datos (``DINOSOURCE_LIVE_UPDATE_MS``),
+cada sesión manda también esas consultas: una por intervalo durante el
+tiempo de lectura simulado entre acciones (``--think-ms``, no se duerme).
+"""
+
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+UPDATE_PATH = "/_dash-update-component"
+PAGE_FIELD = "dinosource_page"
+PAGES = ("btn-overview", "btn-periodo", "btn-facts", "btn-timeline", "btn-taxonomy")
+PERIODO_CALLBACKS = (
+    "tiles-container.children",
+    "grafico-periodo-paises.figure",
+    "grafico-top-paises.figure",
+    "export-container.children",
+)
+
+
+# Transportes: test client de Flask (en proceso) o HTTP real
+class FlaskTransport:
+    def __init__(self, server):
+        self.server = server
+        self._local = threading.local()
+
+    def _client(self):
+        # El test client no es seguro entre hilos: uno por hilo
+        if not hasattr(self._local, "client"):
+            # Sin cookies propias: cada sesión manda la suya en los headers
+            self._local.client = self.server.test_client(use_cookies=False)
+        return self._local.client
+
+    def get(self, path):
+        res = self._client().get(path)
+        return res.status_code, res.get_data()
+
+    def post(self, path, payload, headers=None):
+        res = self._client().post(path, json=payload, headers=headers)
+        return res.status_code, res.get_data()
+
+
+class HttpTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def get(self, path):
+        res = self._session().get(self.base_url + path)
+        return res.status_code, res.content
+
+    def post(self, path, payload, headers=None):
+        res = self._session().post(self.base_url + path, json=payload, headers=headers)
+        return res.status_code, res.content
+
+
+def callback_name(output):
+    # Nombre legible del callback para el reporte (primer output)
+    return output.strip(".").split("...")[0]
+
+
+def load_dependencies(transport):
+    status, body = transport.get("/_dash-dependencies")
+    if status != 200:
+        raise RuntimeError(f"/_dash-dependencies respondió {status}")
+    return {callback_name(dep["output"]): dep for dep in json.loads(body)}
+
+
+def find_component(tree, component_id):
+    # Busca un componente por id dentro de un árbol de layout serializado
+    if isinstance(tree, dict):
+        props = tree.get("props", {})
+        if props.get("id") == component_id:
+            return tree
+        for value in props.values():
+            found = find_component(value, component_id)
+            if found is not None:
+                return found
+    elif isinstance(tree, list):
+        for item in tree:
+            found = find_component(item, component_id)
+            if found is not None:
+                return found
+    return None
+
+
+def figure_ids(figure):
+    # ids de la primera traza, de una figura completa o de un Patch
+    if "operations" in figure:
+        for operation in figure["operations"]:
+            if operation["location"] == ["data", 0, "ids"]:
+                return operation["params"]["value"]
+        return None
+    return figure["data"][0]["ids"]
+
+
+def parse_outputs(output):
+    # "id.prop" para un solo output, "..a.b...c.d.." para varios; dash-renderer
+    # envía un dict en el primer caso y una lista en el segundo
+    if not output.startswith(".."):
+        component_id, prop = output.rsplit(".", 1)
+        return {"id": component_id, "property": prop}
+    return [parse_outputs(spec) for spec in output[2:-2].split("...")]
+
+
+class Session:
+    """Una sesión de usuario: mantiene el estado de los componentes y arma
+    los payloads igual que dash-renderer."""
+
+    def __init__(
+        self,
+        transport,
+        dependencies,
+        recorder,
+        rng,
+        dataset=None,
+        burst=1,
+        think_ms=0,
+    ):
+        self.transport = transport
+        self.dependencies = dependencies
+        self.recorder = recorder
+        self.rng = rng
+        self.search = f"?dataset={dataset}" if dataset else ""
+        self.burst = burst
+        self.think_ms = think_ms
+        # Versión de los datos que conoce la página y estado del Interval
+        self.data_version = None
+        self.page_state = None
+        self.poll_ms = None
+        self.polls = 0
+        self.idle_ms = 0
+        # Cookie de sesión, la misma para todas las requests de la sesión, e
+        # id de página como el que agrega el renderer (ver coalesce.py)
+        self.headers = {"Cookie": f"dinosource_sid={rng.getrandbits(64):016x}"}
+        self.page_id = f"{rng.getrandbits(64):016x}"
+
+    def fetch(self, name, path):
+        start = time.perf_counter()
+        status, body = self.transport.get(path)
+        self.recorder.record(name, time.perf_counter() - start, status, len(body))
+        return body
+
+    def fire(self, name, inputs, changed=(), state=None):
+        dep = self.dependencies[name]
+        # Todos los callbacks resuelven el dataset desde la URL
+        inputs = {
+            "url.search": self.search,
+            "data-version.data": self.data_version,
+            **inputs,
+        }
+        state = {
+            "url.search": self.search,
+            "data-version.data": self.data_version,
+            "page-state.data": self.page_state,
+            **(state or {}),
+        }
+        payload = {
+            "output": dep["output"],
+            "outputs": parse_outputs(dep["output"]),
+            "inputs": [
+                {
+                    "id": i["id"],
+                    "property": i["property"],
+                    "value": inputs[f"{i['id']}.{i['property']}"],
+                }
+                for i in dep["inputs"]
+            ],
+            "changedPropIds": list(changed),
+            "state": [
+                {
+                    "id": s["id"],
+                    "property": s["property"],
+                    "value": state[f"{s['id']}.{s['property']}"],
+                }
+                for s in dep["state"]
+            ],
+            PAGE_FIELD: self.page_id,
+        }
+        start = time.perf_counter()
+        status, body = self.transport.post(UPDATE_PATH, payload, self.headers)
+        self.recorder.record(name, time.perf_counter() - start, status, len(body))
+        if status != 200:
+            return {}
+        return json.loads(body).get("response", {})
+
+    # Pasos de la sesión
+    def initial_load(self):
+        self.fetch("GET /", "/" + self.search)
+        layout = json.loads(self.fetch("GET /_dash-layout", "/_dash-layout"))
+        poll = find_component(layout, "data-poll")
+        if poll is not None and not poll["props"].get("disabled"):
+            self.poll_ms = poll["props"]["interval"]
+        self.fetch("GET /_dash-dependencies", "/_dash-dependencies")
+        self.fire("dataset-links.children", {})
+        self.clicks = {b: 0 for b in PAGES}
+        self.show_page(None)
+
+    def show_page(self, button_id):
+        if button_id is not None:
+            self.clicks[button_id] += 1
+        response = self.fire(
+            "page-content.children",
+            {f"{k}.n_clicks": v for k, v in self.clicks.items()},
+            changed=[f"{button_id}.n_clicks"] if button_id else [],
+        )
+        content = response.get("page-content", {}).get("children")
+        self.page_state = response.get("page-state", {}).get("data", self.page_state)
+        if find_component(content, "btn-asc-desc") is not None:
+            self.asc_desc = 0
+            self.fire("grafico-top-longitud.figure", {"btn-asc-desc.n_clicks": 0})
+        checklist = find_component(content, "my-checklist")
+        if checklist is not None:
+            self.options = checklist["props"]["options"]
+            self.update_checklists([], [], changed=[])
+        taxonomy = find_component(content, "grafico-taxonomia")
+        if taxonomy is not None:
+            self.taxonomy_root = find_component(content, "taxonomy-root")["props"][
+                "data"
+            ]
+            self.taxonomy_type = "sunburst"
+            self.taxonomy_up = 0
+            self.taxonomy_ids = figure_ids(taxonomy["props"]["figure"])
+        slider = find_component(content, "time-slider")
+        if slider is not None:
+            self.slider = slider["props"]
+            self.time_value = self.slider["value"]
+            self.fire("timeline-label.children", {"time-slider.value": self.time_value})
+            self.time_range = find_component(content, "time-range")["props"]["value"]
+            self.fire(
+                "timeline-overlap.children", {"time-range.value": self.time_range}
+            )
+
+    def update_taxonomy(self, changed):
+        response = self.fire(
+            "grafico-taxonomia.figure",
+            {
+                "taxonomy-root.data": self.taxonomy_root,
+                "taxonomy-chart-type.value": self.taxonomy_type,
+            },
+            changed,
+        )
+        figure = response.get("grafico-taxonomia", {}).get("figure")
+        if figure:
+            self.taxonomy_ids = figure_ids(figure) or self.taxonomy_ids
+
+    def move_taxonomy_root(self, click_data, changed):
+        response = self.fire(
+            "taxonomy-root.data",
+            {
+                "grafico-taxonomia.clickData": click_data,
+                "btn-taxonomy-up.n_clicks": self.taxonomy_up,
+            },
+            changed,
+            state={"taxonomy-root.data": self.taxonomy_root},
+        )
+        self.taxonomy_root = response.get("taxonomy-root", {}).get(
+            "data", self.taxonomy_root
+        )
+        self.update_taxonomy(["taxonomy-root.data"])
+
+    def drill_taxonomy(self):
+        children = [i for i in self.taxonomy_ids if i != self.taxonomy_root]
+        if not children:
+            return self.taxonomy_go_up()
+        click_data = {"points": [{"id": self.rng.choice(children)}]}
+        self.move_taxonomy_root(click_data, ["grafico-taxonomia.clickData"])
+
+    def taxonomy_go_up(self):
+        self.taxonomy_up += 1
+        self.move_taxonomy_root(None, ["btn-taxonomy-up.n_clicks"])
+
+    def toggle_taxonomy_chart(self):
+        self.taxonomy_type = (
+            "treemap" if self.taxonomy_type == "sunburst" else "sunburst"
+        )
+        self.update_taxonomy(["taxonomy-chart-type.value"])
+
+    def is_clientside(self, name):
+        return bool(self.dependencies[name].get("clientside_function"))
+
+    def update_checklists(self, all_selected, selected, changed):
+        if self.is_clientside("my-checklist.value"):
+            # Con DINOSOURCE_PERIODO_CLIENTSIDE la página de periodo se filtra
+            # en el navegador y no hay requests que medir
+            all_values = [option["value"] for option in self.options]
+            if not changed:
+                selected = all_values
+            elif "all-or-none.value" in changed:
+                selected = all_values if all_selected else []
+            self.selected = selected
+            self.all_selected = ["Todos"] if len(selected) == len(all_values) else []
+            return
+
+        response = self.fire(
+            "my-checklist.value",
+            {"all-or-none.value": all_selected, "my-checklist.value": selected},
+            changed=changed,
+            state={"my-checklist.options": self.options},
+        )
+        selected = response.get("my-checklist", {}).get("value", selected)
+        self.selected = selected
+        self.all_selected = response.get("all-or-none", {}).get("value", [])
+        self.update_periodo(selected)
+
+    def update_periodo(self, selected):
+        # Con DINOSOURCE_CHECKLIST_DEBOUNCE_MS los callbacks leen la selección
+        # de "periodo-selection" en vez de "my-checklist"; se mandan ambas
+        inputs = {
+            "my-checklist.value": selected,
+            "periodo-selection.data": selected,
+            "grafico-periodo-paises.clickData": None,
+        }
+        for name in PERIODO_CALLBACKS:
+            trigger = self.dependencies[name]["inputs"][0]
+            self.fire(name, inputs, [f"{trigger['id']}.{trigger['property']}"])
+
+    def toggled(self, selected):
+        period = self.rng.choice(self.options)["value"]
+        if period in selected:
+            return [p for p in selected if p != period]
+        return selected + [period]
+
+    def toggle_period(self):
+        if self.burst > 1 and not self.is_clientside("my-checklist.value"):
+            return self.burst_periods()
+        selected = self.toggled(self.selected)
+        self.update_checklists(self.all_selected, selected, ["my-checklist.value"])
+
+    def burst_periods(self):
+        # Varios clicks seguidos: el navegador manda los callbacks de cada
+        # click sin esperar las respuestas de los anteriores
+        selections = [self.selected]
+        for _ in range(self.burst):
+            selections.append(self.toggled(selections[-1]))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.burst) as pool:
+            list(pool.map(self.update_periodo, selections[1:]))
+        # Lo que espera el usuario: hasta que llega la última selección
+        self.recorder.record("burst", time.perf_counter() - start, 200, 0)
+        self.selected = selections[-1]
+        self.all_selected = ["Todos"] if len(self.selected) == len(self.options) else []
+
+    def toggle_all(self):
+        all_selected = [] if self.all_selected else ["Todos"]
+        self.update_checklists(all_selected, self.selected, ["all-or-none.value"])
+
+    def flip_asc_desc(self):
+        self.asc_desc += 1
+        self.fire(
+            "grafico-top-longitud.figure",
+            {"btn-asc-desc.n_clicks": self.asc_desc},
+            ["btn-asc-desc.n_clicks"],
+        )
+
+    def scrub_timeline(self):
+        # Arrastrar el slider dispara un callback por cada paso
+        target = self.rng.uniform(self.slider["min"], self.slider["max"])
+        step = self.slider["step"] if target > self.time_value else -self.slider["step"]
+        for _ in range(min(int(abs(target - self.time_value) / abs(step)), 15)):
+            self.time_value += step
+            self.fire(
+                "timeline-label.children",
+                {"time-slider.value": self.time_value},
+                ["time-slider.value"],
+            )
+
+    def move_time_range(self):
+        low = self.rng.uniform(self.slider["min"], self.slider["max"])
+        high = min(low + self.rng.uniform(1, 20), self.slider["max"])
+        self.time_range = [round(low), round(high)]
+        self.fire(
+            "timeline-overlap.children",
+            {"time-range.value": self.time_range},
+            ["time-range.value"],
+        )
+
+    def poll(self):
+        self.polls += 1
+        response = self.fire(
+            "data-version.data",
+            {"data-poll.n_intervals": self.polls},
+            ["data-poll.n_intervals"],
+        )
+        self.data_version = response.get("data-version", {}).get(
+            "data", self.data_version
+        )
+
+    def think(self):
+        # Las consultas del Interval que caen en el tiempo de lectura entre
+        # acciones se mandan sin esperar
+        if not self.poll_ms:
+            return
+        self.idle_ms += self.think_ms
+        while self.idle_ms >= self.poll_ms:
+            self.idle_ms -= self.poll_ms
+            self.poll()
+
+    def run(self, interactions):
+        self.initial_load()
+        page = "btn-overview"
+        for _ in range(interactions):
+            self.think()
+            if page == "btn-periodo":
+                action = self.rng.choice(
+                    ["toggle_period", "toggle_period", "toggle_all", "switch"]
+                )
+            elif page == "btn-overview":
+                action = self.rng.choice(["flip_asc_desc", "switch"])
+            elif page == "btn-timeline":
+                action = self.rng.choice(
+                    ["scrub_timeline", "move_time_range", "switch"]
+                )
+            elif page == "btn-taxonomy":
+                action = self.rng.choice(
+                    [
+                        "drill_taxonomy",
+                        "drill_taxonomy",
+                        "taxonomy_go_up",
+                        "toggle_taxonomy_chart",
+                        "switch",
+                    ]
+                )
+            else:
+                action = "switch"
+
+            if action == "switch":
+                page = self.rng.choice([b for b in PAGES if b != page])
+                self.show_page(page)
+            else:
+                getattr(self, action)()
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.skipped = defaultdict(int)
+        self.bytes = defaultdict(int)
+
+    def record(self, name, elapsed, status, size):
+        with self.lock:
+            self.samples[name].append(elapsed)
+            self.bytes[name] += size
+            # 204: PreventUpdate o request descartada por una más nueva
+            if status == 204:
+                self.skipped[name] += 1
+            elif status != 200:
+                self.errors[name] += 1
+
+    def total_requests(self):
+        return sum(len(s) for s in self.samples.values())
+
+    def summary(self):
+        rows = []
+        for name in sorted(self.samples):
+            ms = np.array(self.samples[name]) * 1000
+            rows.append(
+                {
+                    "callback": name,
+                    "count": len(ms),
+                    "errors": self.errors[name],
+                    "skipped": self.skipped[name],
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p95_ms": float(np.percentile(ms, 95)),
+                    "p99_ms": float(np.percentile(ms, 99)),
+                    "avg_bytes": self.bytes[name] / len(ms),
+                }
+            )
+        return rows
+
+
+def run_load(
+    transport,
+    sessions,
+    concurrency,
+    interactions,
+    seed,
+    dataset=None,
+    burst=1,
+    think_ms=0,
+):
+    dependencies = load_dependencies(transport)
+    recorder = Recorder()
+
+    def one_session(i):
+        Session(
+            transport,
+            dependencies,
+            recorder,
+            random.Random(seed + i),
+            dataset,
+            burst,
+            think_ms,
+        ).run(interactions)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_session, range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed_s": elapsed,
+        "requests": recorder.total_requests(),
+        "throughput_rps": recorder.total_requests() / elapsed,
+        "callbacks": recorder.summary(),
+    }
+
+
+def print_report(label, result):
+    print(
+        f"\n== {label}: {result['requests']} requests en {result['elapsed_s']:.2f}s "
+        f"({result['throughput_rps']:.1f} req/s)"
+    )
+    print(
+        f"{'callback':<34}{'n':>7}{'err':>5}{'204':>5}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'bytes':>10}"
+    )
+    for row in result["callbacks"]:
+        print(
+            f"{row['callback']:<34}{row['count']:>7}{row['errors']:>5}{row['skipped']:>5}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+            f"{row['avg_bytes']:>10.0f}"
+        )
+
+
+def print_curve(curve):
+    print("\n== Curva de escalado")
+    print(
+        f"{'workers':>8}{'threads':>8}{'conc':>6}{'req/s':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for point in curve:
+        callbacks = [
+            row for row in point["callbacks"] if not row["callback"].startswith("GET")
+        ]
+        p95 = max((row["p95_ms"] for row in callbacks), default=0.0)
+        p99 = max((row["p99_ms"] for row in callbacks), default=0.0)
+        print(
+            f"{point['workers']:>8}{point['threads']:>8}{point['concurrency']:>6}"
+            f"{point['throughput_rps']:>10.1f}{p95:>10.1f}{p99:>10.1f}"
+        )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, timeout=120):
+    port = free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "app:server",
+            "--workers",
+            str(workers),
+            "--threads",
+            str(threads),
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--log-level",
+            "warning",
+        ]
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn terminó antes de estar listo")
+        try:
+            if requests.get(base_url + "/_dash-layout", timeout=2).status_code == 200:
+                return proc, base_url
+        except requests.ConnectionError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("gunicorn no respondió a tiempo")
+
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generador de carga para dinosource")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument(
+        "--url", help="Servidor ya levantado (ej. http://127.0.0.1:8050)"
+    )
+    target.add_argument(
+        "--gunicorn",
+        action="store_true",
+        help="Levantar gunicorn local para cada combinación de workers/threads",
+    )
+    parser.add_argument("--workers", type=int_list, default=[1])
+    parser.add_argument("--threads", type=int_list, default=[1])
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Sesiones simultáneas (por defecto workers * threads)",
+    )
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--interactions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dataset", help="Dataset a consultar (?dataset=...)")
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=1,
+        help="Clicks seguidos por cada cambio de periodo (sin esperar respuestas)",
+    )
+    parser.add_argument(
+        "--think-ms",
+        type=int,
+        default=5000,
+        help="Tiempo de lectura simulado entre acciones, para las consultas de "
+        "la versión de los datos",
+    )
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    curve = []
+    if args.url:
+        concurrency = args.concurrency or 1
+        result = run_load(
+            HttpTransport(args.url),
+            args.sessions,
+            concurrency,
+            args.interactions,
+            args.seed,
+            args.dataset,
+            args.burst,
+            args.think_ms,
+        )
+        result.update(workers=0, threads=0, concurrency=concurrency)
+        print_report(args.url, result)
+        curve.append(result)
+    elif args.gunicorn:
+        for workers in args.workers:
+            for threads in args.threads:
+                concurrency = args.concurrency or workers * threads
+                proc, base_url = start_gunicorn(workers, threads)
+                try:
+                    result = run_load(
+                        HttpTransport(base_url),
+                        args.sessions,
+                        concurrency,
+                        args.interactions,
+                        args.seed,
+                        args.dataset,
+                        args.burst,
+                        args.think_ms,
+                    )
+                finally:
+                    proc.terminate()
+                    proc.wait()
+                result.update(workers=workers, threads=threads, concurrency=concurrency)
+                print_report(f"gunicorn -w {workers} --threads {threads}", result)
+                curve.append(result)
+    else:
+        from app import server
+
+        transport = FlaskTransport(server)
+        for threads in args.threads:
+            concurrency = args.concurrency or threads
+            result = run_load(
+                transport,
+                args.sessions,
+                concurrency,
+                args.interactions,
+                args.seed,
+                args.dataset,
+                args.burst,
+                args.think_ms,
+            )
+            result.update(workers=1, threads=threads, concurrency=concurrency)
+            print_report(f"en proceso, {concurrency} hilos", result)
+            curve.append(result)
+
+    if len(curve) > 1:
+        print_curve(curve)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(curve, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Diagnóstico de memoria opcional para dinosource.
+
+Se activa con la variable de entorno ``DINOSOURCE_MEMDIAG=1``. Una vez
+activo expone, sobre el servidor Flask:
+
+- ``GET /_diag/memory``: uso profundo de cada estructura registrada (dataset,
+  índices derivados, caches), RSS del proceso, memoria trazada por
+  tracemalloc y el pico de asignaciones por callback.
+- ``POST /_diag/memory/snapshot``: toma un snapshot de tracemalloc y lo
+  guarda como referencia.
+- ``GET /_diag/memory/diff?limit=25``: compara el estado actual contra el
+  snapshot de referencia, agrupado por línea de código.
+
+Además cada request a ``_dash-update-component`` registra en el logger
+``dinosource.memdiag`` el pico de asignaciones del callback. Con varios hilos
+por worker los picos se solapan, así que conviene medir con ``--threads 1``.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from flask import g, jsonify, request
+
+logger = logging.getLogger("dinosource.memdiag")
+
+enabled = os.environ.get("DINOSOURCE_MEMDIAG", "") not in ("", "0", "false")
+
+# Estructuras registradas: nombre -> (categoría, función que devuelve el objeto)
+_registry = {}
+_lock = threading.Lock()
+_callback_stats = defaultdict(lambda: {"count": 0, "max_peak": 0, "total_peak": 0})
+_baseline = None
+
+
+def register(name, getter, kind="dataset"):
+    # Se guarda una función y no el objeto para seguir las reasignaciones
+    with _lock:
+        _registry[name] = (kind, getter)
+
+
+def unregister(name):
+    with _lock:
+        _registry.pop(name, None)
+
+
+def deep_sizeof(obj, seen=None):
+    # Tamaño profundo aproximado en bytes
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(
+            deep_sizeof(getattr(obj, slot), seen)
+            for slot in obj.__slots__
+            if hasattr(obj, slot)
+        )
+    return size
+
+
+def rss_bytes():
+    # RSS actual en Linux; en otros sistemas se usa el máximo de getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def breakdown():
+    # Copia: los motores se registran y desregistran mientras se recorre
+    with _lock:
+        registry = list(_registry.items())
+    items = []
+    for name, (kind, getter) in registry:
+        items.append({"name": name, "kind": kind, "bytes": deep_sizeof(getter())})
+    return sorted(items, key=lambda item: item["bytes"], reverse=True)
+
+
+def callback_stats():
+    with _lock:
+        return {
+            name: {
+                "count": stats["count"],
+                "max_peak_bytes": stats["max_peak"],
+                "avg_peak_bytes": stats["total_peak"] / stats["count"],
+            }
+            for name, stats in _callback_stats.items()
+        }
+
+
+def _top_stats(limit):
+    current = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    stats = current.compare_to(_baseline, "lineno")[:limit]
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff_bytes": stat.size_diff,
+            "size_bytes": stat.size,
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats
+    ]
+
+
+def _is_callback_request():
+    return request.path.endswith("_dash-update-component")
+
+
+def init_app(server):
+    if not enabled:
+        return
+
+    tracemalloc.start()
+    started_at = time.time()
+
+    @server.before_request
+    def _memdiag_before():
+        if _is_callback_request():
+            tracemalloc.reset_peak()
+            g.memdiag_start = tracemalloc.get_traced_memory()[0]
+
+    @server.after_request
+    def _memdiag_after(response):
+        if _is_callback_request() and "memdiag_start" in g:
+            peak = tracemalloc.get_traced_memory()[1] - g.memdiag_start
+            body = request.get_json(silent=True) or {}
+            name = body.get("output", "?")
+            with _lock:
+                stats = _callback_stats[name]
+                stats["count"] += 1
+                stats["total_peak"] += peak
+                stats["max_peak"] = max(stats["max_peak"], peak)
+            logger.info("callback %s: pico de %d bytes", name, peak)
+        return response
+
+    @server.route("/_diag/memory")
+    def _memdiag_memory():
+        current, peak = tracemalloc.get_traced_memory()
+        return jsonify(
+            {
+                "pid": os.getpid(),
+                "uptime_s": time.time() - started_at,
+                "rss_bytes": rss_bytes(),
+                "traced_current_bytes": current,
+                "traced_peak_bytes": peak,
+                "breakdown": breakdown(),
+                "callbacks": callback_stats(),
+            }
+        )
+
+    @server.route("/_diag/memory/snapshot", methods=["POST"])
+    def _memdiag_snapshot():
+        global _baseline
+        _baseline = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        return jsonify({"traced_current_bytes": tracemalloc.get_traced_memory()[0]})
+
+    @server.route("/_diag/memory/diff")
+    def _memdiag_diff():
+        if _baseline is None:
+            return jsonify({"error": "No hay snapshot de referencia"}), 409
+        limit = request.args.get("limit", 25, type=int)
+        return jsonify({"rss_bytes": rss_bytes(), "top": _top_stats(limit)})
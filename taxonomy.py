@@ -0,0 +1,213 @@
+"""Árbol taxonómico con agregados jerárquicos precalculados.
+
+La columna ``taxonomy`` trae el linaje completo separado por espacios
+("Dinosauria Saurischia Theropoda ..."). ``TaxonomyTree`` lo convierte en un
+árbol al cargar los datos y acumula de abajo hacia arriba, una sola vez, la
+cantidad de especies y las estadísticas de longitud de cada nodo. Explorar
+el árbol solo recorre los nodos que se devuelven.
+"""
+
+import numpy as np
+import pandas as pd
+
+ROOT = "Todos"
+ROOT_LABEL = ROOT
+UNCLASSIFIED = "Sin clasificar"
+
+
+def lineage_paths(taxonomy):
+    # "Dinosauria Saurischia ..." -> "Dinosauria/Saurischia/...". Como
+    # "string" para que funcione aunque no haya ninguna taxonomía (una
+    # tanda ingerida sin esa columna)
+    return (
+        taxonomy.astype("string")
+        .str.strip()
+        .str.replace(r"\s+", "/", regex=True)
+        .fillna(UNCLASSIFIED)
+        .astype(object)
+    )
+
+
+class TaxonomyTree:
+    def __init__(self, taxonomy, length):
+        path = lineage_paths(taxonomy)
+        leaves = (
+            pd.DataFrame({"path": path, "length": length})
+            .groupby("path")["length"]
+            .agg(["size", "count", "sum", "min", "max"])
+        )
+
+        # Nodos: el id es el linaje hasta el nodo ("Dinosauria/Saurischia")
+        self.index = {ROOT: 0}
+        ids, labels, parents, depths = [ROOT], [ROOT_LABEL], [-1], [0]
+        leaf_nodes = []
+        for lineage in leaves.index:
+            parent = 0
+            parts = lineage.split("/")
+            for depth in range(1, len(parts) + 1):
+                node_id = "/".join(parts[:depth])
+                node = self.index.get(node_id)
+                if node is None:
+                    node = len(ids)
+                    self.index[node_id] = node
+                    ids.append(node_id)
+                    labels.append(parts[depth - 1])
+                    parents.append(parent)
+                    depths.append(depth)
+                parent = node
+            leaf_nodes.append(parent)
+
+        self.ids = np.array(ids, dtype=object)
+        self.labels = np.array(labels, dtype=object)
+        self.parents = np.array(parents, dtype=np.intp)
+        self.depths = np.array(depths, dtype=np.intp)
+
+        # Estadísticas propias de cada nodo y luego acumuladas hacia la raíz
+        n = len(ids)
+        leaf_nodes = np.array(leaf_nodes, dtype=np.intp)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.length_count = np.zeros(n, dtype=np.int64)
+        self.length_sum = np.zeros(n)
+        self.length_min = np.full(n, np.inf)
+        self.length_max = np.full(n, -np.inf)
+        np.add.at(self.count, leaf_nodes, leaves["size"].to_numpy())
+        np.add.at(self.length_count, leaf_nodes, leaves["count"].to_numpy())
+        np.add.at(self.length_sum, leaf_nodes, leaves["sum"].fillna(0).to_numpy())
+        np.minimum.at(
+            self.length_min, leaf_nodes, leaves["min"].fillna(np.inf).to_numpy()
+        )
+        np.maximum.at(
+            self.length_max, leaf_nodes, leaves["max"].fillna(-np.inf).to_numpy()
+        )
+
+        for depth in range(self.depths.max(), 0, -1):
+            nodes = np.flatnonzero(self.depths == depth)
+            parents = self.parents[nodes]
+            np.add.at(self.count, parents, self.count[nodes])
+            np.add.at(self.length_count, parents, self.length_count[nodes])
+            np.add.at(self.length_sum, parents, self.length_sum[nodes])
+            np.minimum.at(self.length_min, parents, self.length_min[nodes])
+            np.maximum.at(self.length_max, parents, self.length_max[nodes])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.length_mean = self.length_sum / self.length_count
+        self.length_min[np.isinf(self.length_min)] = np.nan
+        self.length_max[np.isinf(self.length_max)] = np.nan
+
+        # Hijos de cada nodo, ordenados por cantidad descendente
+        self.children = [[] for _ in range(n)]
+        for node in np.argsort(-self.count, kind="stable"):
+            if self.parents[node] >= 0:
+                self.children[self.parents[node]].append(int(node))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, taxonomy, length):
+        # Suma filas nuevas: crea los nodos que falten y actualiza las
+        # estadísticas solo sobre el camino de cada fila hasta la raíz
+        path = lineage_paths(taxonomy)
+        length = np.asarray(length, dtype=float)
+
+        n = len(self.ids)
+        new_index = {}
+        ids, labels, parents, depths = [], [], [], []
+        rows, ancestors = [], []
+        for row, lineage in enumerate(path):
+            parent = 0
+            parts = lineage.split("/")
+            chain = [0]
+            for depth in range(1, len(parts) + 1):
+                node_id = "/".join(parts[:depth])
+                node = self.index.get(node_id, new_index.get(node_id))
+                if node is None:
+                    node = n + len(ids)
+                    new_index[node_id] = node
+                    ids.append(node_id)
+                    labels.append(parts[depth - 1])
+                    parents.append(parent)
+                    depths.append(depth)
+                chain.append(node)
+                parent = node
+            rows.extend([row] * len(chain))
+            ancestors.extend(chain)
+
+        # Arreglos nuevos (copias), para que un hilo que lee a la vez vea el
+        # árbol anterior completo o el nuevo
+        m = len(ids)
+        count = np.concatenate([self.count, np.zeros(m, dtype=np.int64)])
+        length_count = np.concatenate([self.length_count, np.zeros(m, dtype=np.int64)])
+        length_sum = np.concatenate([self.length_sum, np.zeros(m)])
+        length_min = np.concatenate([self.length_min, np.full(m, np.nan)])
+        length_max = np.concatenate([self.length_max, np.full(m, np.nan)])
+
+        ancestors = np.array(ancestors, dtype=np.intp)
+        values = length[rows]
+        valid = ~np.isnan(values)
+        np.add.at(count, ancestors, 1)
+        np.add.at(length_count, ancestors, valid)
+        np.add.at(length_sum, ancestors, np.where(valid, values, 0))
+        np.fmin.at(length_min, ancestors, values)
+        np.fmax.at(length_max, ancestors, values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            length_mean = length_sum / length_count
+
+        self.ids = np.concatenate([self.ids, np.array(ids, dtype=object)])
+        self.labels = np.concatenate([self.labels, np.array(labels, dtype=object)])
+        self.parents = np.concatenate([self.parents, np.array(parents, dtype=np.intp)])
+        self.depths = np.concatenate([self.depths, np.array(depths, dtype=np.intp)])
+        self.count, self.length_count, self.length_sum = count, length_count, length_sum
+        self.length_min, self.length_max = length_min, length_max
+        self.length_mean = length_mean
+
+        # Reordenar los hijos de cada nodo cuyo conteo cambió
+        children = self.children + [[] for _ in range(m)]
+        for node, parent in zip(range(n, n + m), parents):
+            children[parent] = children[parent] + [node]
+        for parent in np.unique(self.parents[np.unique(ancestors)]):
+            if parent >= 0:
+                children[parent] = sorted(
+                    children[parent], key=lambda node: (-count[node], node)
+                )
+        self.children = children
+        self.index.update(new_index)
+
+    def parent_id(self, node_id):
+        node = self.index.get(node_id, 0)
+        return self.ids[self.parents[node]] if node else ROOT
+
+    def node(self, node_id):
+        # Estadísticas de un nodo
+        node = self.index.get(node_id, 0)
+        return {
+            "id": self.ids[node],
+            "label": self.labels[node],
+            "count": int(self.count[node]),
+            "children": len(self.children[node]),
+            "length_mean": self.length_mean[node],
+            "length_min": self.length_min[node],
+            "length_max": self.length_max[node],
+        }
+
+    def subtree(self, node_id, depth=3):
+        # Nodos del subárbol hasta `depth` niveles debajo de node_id, en orden
+        # de recorrido por niveles
+        root = self.index.get(node_id, 0)
+        nodes = [root]
+        level = [root]
+        for _ in range(depth):
+            level = [child for node in level for child in self.children[node]]
+            if not level:
+                break
+            nodes.extend(level)
+        nodes = np.array(nodes, dtype=np.intp)
+
+        parents = self.ids[self.parents[nodes]]
+        parents[0] = ""
+        return {
+            "ids": self.ids[nodes].tolist(),
+            "labels": self.labels[nodes].tolist(),
+            "parents": parents.tolist(),
+            "values": self.count[nodes].tolist(),
+            "length_mean": np.round(self.length_mean[nodes], 2).tolist(),
+        }
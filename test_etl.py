@@ -0,0 +1,95 @@
+"""Snapshot incremental de ``etl.update_snapshot`` y validaciones de los
+pasos.
+
+    python -m pytest -q test_etl.py
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+import etl
+from test_incremental import raw_records
+
+
+def write_source(path, records, mode="w", header=True):
+    frame = pd.DataFrame(records, columns=etl.RAW_COLUMNS)
+    frame.to_csv(path, mode=mode, header=header, index=False)
+
+
+def full_run(source):
+    data, _ = etl.run(etl.read_source(source))
+    return data
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "source.csv", str(tmp_path / "snapshots" / "prueba.pkl")
+
+
+def test_appended_rows_match_full_run(paths):
+    source, snapshot = paths
+    write_source(source, raw_records(80))
+    data, report = etl.update_snapshot(source, snapshot)
+    assert report[-1]["rows"] == 80
+
+    write_source(source, raw_records(15, seed=1, prefix="nuevo"), "a", False)
+    data, report = etl.update_snapshot(source, snapshot)
+    # Solo se limpiaron las filas nuevas
+    assert report[-1]["rows"] == 15
+    pd.testing.assert_frame_equal(data, full_run(source), check_dtype=False)
+    pd.testing.assert_frame_equal(
+        etl.read_snapshot(snapshot), full_run(source), check_dtype=False
+    )
+    with open(f"{snapshot}.json") as f:
+        assert json.load(f)["raw_rows"] == 95
+
+    # Sin cambios no se limpia nada
+    data, report = etl.update_snapshot(source, snapshot)
+    assert report == [] and len(data) == 95
+
+
+def test_rewritten_source_is_reprocessed(paths):
+    source, snapshot = paths
+    records = raw_records(80)
+    write_source(source, records)
+    etl.update_snapshot(source, snapshot)
+
+    # Se corrige una fila del medio y se agregan otras al final
+    records[40]["name"] = "corregidosaurus"
+    write_source(source, records + raw_records(5, seed=1, prefix="nuevo"))
+    data, report = etl.update_snapshot(source, snapshot)
+    assert report[-1]["rows"] == 85
+    assert data["name"].iloc[40] == "Corregidosaurus"
+    pd.testing.assert_frame_equal(data, full_run(source), check_dtype=False)
+
+
+def test_text_appended_to_last_row_is_reprocessed(paths):
+    source, snapshot = paths
+    write_source(source, raw_records(10))
+    content = source.read_bytes().rstrip(b"\n")
+    source.write_bytes(content)
+    etl.update_snapshot(source, snapshot)
+
+    # Lo nuevo continúa la última fila en vez de empezar una
+    source.write_bytes(content + b"extra\n")
+    data, report = etl.update_snapshot(source, snapshot)
+    assert report[-1]["rows"] == 10
+    pd.testing.assert_frame_equal(data, full_run(source), check_dtype=False)
+
+
+@pytest.mark.parametrize(
+    "changes, message",
+    [
+        ({"period": "sin periodo"}, "Periodo no reconocido"),
+        ({"lived_in": "wales "}, "Valores sin corregir"),
+        ({"period": "usa"}, "Valores sin corregir"),
+        ({"length": "-3m"}, "longitudes negativas"),
+    ],
+)
+def test_steps_reject_invalid_rows(changes, message):
+    records = raw_records(5)
+    records[2].update(changes)
+    with pytest.raises(etl.EtlError, match=message):
+        etl.run(pd.DataFrame(records, columns=etl.RAW_COLUMNS).astype(str))
@@ -0,0 +1,35 @@
+"""Nombres de archivo de ``GET /export/<formato>``.
+
+python -m pytest -q test_export.py
+"""
+
+from urllib.parse import unquote
+
+import pytest
+from flask import Flask
+
+import datasets
+import export
+from test_incremental import clean, raw_records
+
+
+@pytest.fixture
+def client():
+    engine = datasets.Engine("dinosaurios", clean(raw_records(20)))
+    server = Flask(__name__)
+    export.init_app(server, lambda dataset: engine)
+    return server.test_client()
+
+
+@pytest.mark.parametrize("pais", ['a"b', "日本", "Perú", "USA"])
+def test_filename_header_is_latin1(client, pais):
+    response = client.get("/export/csv", query_string={"pais": pais})
+    assert response.status_code == 200
+    header = response.headers["Content-Disposition"]
+    # Sin esto el servidor WSGI no puede escribir el header
+    header.encode("latin-1")
+
+    ascii_name = header.split('filename="')[1].split('"')[0]
+    assert ascii_name.isascii() and ascii_name.endswith(".csv")
+    full_name = header.split("filename*=UTF-8''")[1]
+    assert unquote(full_name) == f"dinosaurios-{pais}.csv"
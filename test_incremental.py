@@ -0,0 +1,174 @@
+"""Las estructuras que se actualizan con ``Engine.append`` tienen que quedar
+iguales a las que se construyen desde cero con todas las filas.
+
+    python -m pytest -q test_incremental.py
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+import etl
+from aggregates import GROUPS
+
+PERIODS = [
+    "Late Cretaceous 83-70 million years ago",
+    "Early Jurassic 199-189 million years ago",
+    "Late Triassic 227-221 million years ago",
+    "Mid Jurassic 176-161 million years ago",
+    "Early Cretaceous",
+    "USA",
+]
+COUNTRIES = ["USA", "Argentina", "China", "Mongolia", "North Africa", "Wales"]
+TAXONOMY = [
+    "Dinosauria Saurischia Theropoda Neotheropoda Tetanurae",
+    "Dinosauria Saurischia Sauropodomorpha Sauropoda",
+    "Dinosauria Ornithischia Genasauria Thyreophora Ankylosauria",
+    "Dinosauria Ornithischia Genasauria Cerapoda Ceratopsia",
+]
+
+
+def raw_records(n, seed=0, prefix="dino"):
+    # Registros como los de la fuente cruda (texto, longitudes con "m")
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"{prefix}{i}saurus",
+            "diet": rng.choice(["herbivorous", "carnivorous", "omnivorous"]),
+            "period": rng.choice(PERIODS),
+            "lived_in": rng.choice(COUNTRIES),
+            "type": rng.choice(["large theropod", "sauropod", "ceratopsian"]),
+            "length": f"{rng.randint(10, 300) / 10}m",
+            "taxonomy": rng.choice(TAXONOMY),
+            "named_by": f"Someone ({1850 + i % 150})",
+        }
+        for i in range(n)
+    ]
+
+
+def clean(records):
+    data, _ = etl.run(datasets.records_to_frame(records))
+    return data
+
+
+def extra_records():
+    # Valores que no están en la carga inicial: periodo, país y clado nuevos,
+    # longitudes vacías y enteras
+    records = raw_records(7, seed=1, prefix="nuevo")
+    records[0]["period"] = "Permian 290-280 million years ago"
+    records[1]["lived_in"] = "Peru"
+    records[2]["length"] = ""
+    records[3]["length"] = "99m"
+    records[4]["taxonomy"] = "Dinosauria Nuevo Clado"
+    records[5]["taxonomy"] = ""
+    records[6]["lived_in"] = ""
+    return records
+
+
+def assert_same_engine(a, b):
+    pd.testing.assert_frame_equal(a.data, b.data, check_dtype=False)
+    for name in ("period_index", "country_index"):
+        index_a, index_b = getattr(a, name), getattr(b, name)
+        assert index_a.keys() == index_b.keys()
+        for key in index_b:
+            np.testing.assert_array_equal(index_a[key], index_b[key])
+
+    agg_a, agg_b = a.aggregates, b.aggregates
+    assert agg_a.version == agg_b.version
+    assert agg_a.extremes == agg_b.extremes
+    periods = list(agg_b.period_counts["period"].index)
+    for group in GROUPS:
+        pd.testing.assert_frame_equal(
+            agg_a.period_counts[group], agg_b.period_counts[group], check_names=False
+        )
+        for periodo in ["Todos", periods[:2], periods[-3:]]:
+            pd.testing.assert_series_equal(
+                agg_a.counts(group, periodo), agg_b.counts(group, periodo)
+            )
+            for k in (1, 5, 40):
+                pd.testing.assert_series_equal(
+                    agg_a.top_counts(group, k, periodo),
+                    agg_b.top_counts(group, k, periodo),
+                )
+    for ascending in (True, False):
+        for k in (1, 10, 150):
+            pd.testing.assert_frame_equal(
+                agg_a.top_by_length(k, ascending),
+                agg_b.top_by_length(k, ascending),
+                check_dtype=False,
+            )
+
+    grid = np.arange(300, 60, -0.5)
+    np.testing.assert_array_equal(
+        a.time_index.count_alive(grid), b.time_index.count_alive(grid)
+    )
+    for oldest, newest in [(100, 70), (200, 150), (66, 66), (300, 60)]:
+        np.testing.assert_array_equal(
+            a.time_index.overlapping(newest, oldest),
+            b.time_index.overlapping(newest, oldest),
+        )
+        assert a.time_index.count_overlapping(
+            newest, oldest
+        ) == b.time_index.count_overlapping(newest, oldest)
+    pd.testing.assert_series_equal(a.timeline_counts, b.timeline_counts)
+
+    tree_a, tree_b = a.taxonomy, b.taxonomy
+    assert set(tree_a.index) == set(tree_b.index)
+    for node_id in tree_b.index:
+        assert tree_a.node(node_id) == pytest.approx(tree_b.node(node_id), nan_ok=True)
+        assert tree_a.parent_id(node_id) == tree_b.parent_id(node_id)
+        assert tree_a.subtree(node_id) == pytest.approx(
+            tree_b.subtree(node_id), nan_ok=True
+        )
+
+
+def test_append_matches_full_rebuild():
+    records = raw_records(250) + extra_records()
+    full = clean(records)
+
+    engine = datasets.Engine("a", clean(records[:60]))
+    snapshots = []
+    for lo, hi in [(60, 61), (61, 230), (230, len(records))]:
+        engine.append(clean(records[lo:hi]))
+        snapshots.append(engine.data.copy())
+        snapshots.append(engine.data)
+
+    # Los dataframes anteriores no ven las filas agregadas después
+    for copy, data in zip(snapshots[::2], snapshots[1::2]):
+        pd.testing.assert_frame_equal(data, copy)
+
+    assert_same_engine(engine, datasets.Engine("b", full))
+    assert engine.aggregates.find("nuevo3saurus")["length"] == 99.0
+
+
+def test_version_matches_log_replay(tmp_path, monkeypatch):
+    # Un proceso que ingiere de a tandas y otro que arranca después y aplica
+    # todo el log de una vez tienen que llegar a la misma versión, aunque
+    # una tanda tenga solo longitudes enteras
+    monkeypatch.setenv("DINOSOURCE_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    source = tmp_path / "source.csv"
+    pd.DataFrame(raw_records(120), columns=etl.RAW_COLUMNS).to_csv(source, index=False)
+    monkeypatch.setitem(
+        datasets.DATASETS, "prueba", {"label": "Prueba", "source": str(source)}
+    )
+
+    worker = datasets.EngineCache(2**30)
+    worker.get("prueba")
+    batches = [
+        raw_records(3, seed=2, prefix="entero"),
+        raw_records(2, seed=3, prefix="decimal"),
+        extra_records(),
+        # Una tanda en la que ningún registro trae taxonomía
+        [{**raw_records(1, seed=4, prefix="suelto")[0], "taxonomy": ""}],
+    ]
+    for record in batches[0]:
+        record["length"] = f"{int(float(record['length'][:-1]))}m"
+    for batch in batches:
+        datasets.append_ingest_log("prueba", batch)
+        worker.get("prueba")
+
+    other = datasets.EngineCache(2**30)
+    assert_same_engine(worker.get("prueba"), other.get("prueba"))
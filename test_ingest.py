@@ -0,0 +1,92 @@
+"""Validaciones de ``POST /api/v1/dinosaurs``: lo que se rechaza no llega al
+log de ingesta.
+
+    python -m pytest -q test_ingest.py
+"""
+
+import os
+
+import pandas as pd
+import pytest
+from flask import Flask
+
+import datasets
+import etl
+import ingest
+from test_incremental import raw_records
+
+TOKEN = "s3cret"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+URL = "/api/v1/dinosaurs?dataset=prueba"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DINOSOURCE_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setenv("DINOSOURCE_INGEST_TOKEN", TOKEN)
+    source = tmp_path / "source.csv"
+    pd.DataFrame(raw_records(50), columns=etl.RAW_COLUMNS).to_csv(source, index=False)
+    monkeypatch.setitem(
+        datasets.DATASETS, "prueba", {"label": "Prueba", "source": str(source)}
+    )
+
+    cache = datasets.EngineCache(2**30)
+    server = Flask(__name__)
+    ingest.init_app(server, cache.get, cache.refresh)
+    return server.test_client()
+
+
+def new_record(**changes):
+    return {**raw_records(1, seed=9, prefix="nuevo")[0], **changes}
+
+
+def log_lines():
+    path = datasets.ingest_log_path("prueba")
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [{}, {"Authorization": TOKEN}, {"Authorization": "Bearer otro"}],
+)
+def test_rejects_missing_or_malformed_token(client, headers):
+    assert client.post(URL, json=new_record(), headers=headers).status_code == 401
+    assert log_lines() == 0
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"name": ["a"]},
+        {"name": {"a": 1}},
+        {"length": True},
+        {"taxonomy": ["Dinosauria"]},
+        {"diet": ""},
+        {"foo": 1},
+        {"length": "abc"},
+        {"period": "sin periodo"},
+    ],
+)
+def test_rejects_invalid_records(client, changes):
+    response = client.post(URL, json=new_record(**changes), headers=AUTH)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert log_lines() == 0
+
+
+def test_rejects_repeated_names(client):
+    existing = raw_records(1)[0]["name"]
+    response = client.post(URL, json=new_record(name=existing), headers=AUTH)
+    assert response.status_code == 409
+    assert log_lines() == 0
+
+
+def test_accepts_valid_records(client):
+    records = [new_record(), new_record(name="otrosaurus", length=12.5)]
+    response = client.post(URL, json=records, headers=AUTH)
+    assert response.status_code == 201
+    assert response.get_json()["total"] == 52
+    assert log_lines() == 2